@@ -1,18 +1,105 @@
 #backend/config.py
 import os
+import json
+from datetime import timedelta
+
+
+def database_url():
+    """
+    Reads the database URL from the environment, accepting the legacy
+    "postgres://" scheme some hosting providers still hand out.
+    """
+    url = os.getenv("DATABASE_URL", "sqlite:///employees.db")
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]
+    return url
+
 
 class Config:
     SECRET_KEY = os.getenv("SECRET_KEY", "your_secret_key")
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///employees.db'
+    SQLALCHEMY_DATABASE_URI = database_url()
+    # Extra create_engine() options as JSON, e.g. '{"pool_size": 10, "pool_recycle": 1800}'
+    SQLALCHEMY_ENGINE_OPTIONS = json.loads(os.getenv("SQLALCHEMY_ENGINE_OPTIONS", "{}"))
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Applied to every new SQLite connection (ignored for other databases)
+    SQLITE_PRAGMAS = {
+        "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+        "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+        "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT", 5000)),  # Milliseconds
+        "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", -65536)),  # Negative = KiB (64 MiB)
+        "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", 268435456)),  # 256 MiB
+        "temp_store": os.getenv("SQLITE_TEMP_STORE", "MEMORY"),
+    }
     JWT_SECRET_KEY = os.getenv('your_jwt_secret_key')  # Change this for production
-    CACHE_TYPE = 'SimpleCache'
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=15)
+    JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=7)
+    REVOKED_TOKEN_PRUNE_INTERVAL = 100  # Revocations per worker between prunes of expired ones
+    IDENTITY_CACHE_SIZE = 1024  # Max users kept in each worker's identity cache
+    IDENTITY_CACHE_TTL = 300  # Seconds before a cached identity is re-read
+    # Hashing processes per web worker (0 hashes inline); the cores are split
+    # between the WEB_CONCURRENCY gunicorn workers
+    HASH_POOL_WORKERS = int(
+        os.getenv(
+            "HASH_POOL_WORKERS",
+            max(1, (os.cpu_count() or 1) // int(os.getenv("WEB_CONCURRENCY", 2))),
+        )
+    )
+    HASH_QUEUE_SIZE = 32  # Hash jobs allowed to wait for a pool process before returning 503
+    HASH_TIMEOUT = 10  # Seconds to wait for a hash result
+    HASH_RETRY_AFTER = 1  # Retry-After (seconds) sent when the hashing pool is saturated
+    PAGINATION_DEFAULT_LIMIT = 50  # Page size when ?cursor= is given without ?limit=
+    PAGINATION_MAX_LIMIT = 500  # Largest ?limit= honoured by list endpoints
+    # Max users accepted by POST /users/bulk. Every password is hashed inside
+    # the request (~0.15 s each on one core), so the batch must finish well
+    # within gunicorn's 30 s worker timeout: 50 hashes per pool process is
+    # ~7.5 s of hashing, leaving room for logins sharing the pool
+    USERS_BULK_MAX = int(os.getenv("USERS_BULK_MAX", 50 * max(1, HASH_POOL_WORKERS)))
+    SHARED_STATE_DIR = os.getenv("SHARED_STATE_DIR")  # Directory for state shared by workers (defaults to instance/)
+    LOGIN_RATE_LIMIT_ENABLED = True
+    LOGIN_RATE_LIMIT_IP_BURST = 20  # Login attempts allowed in a burst per client IP
+    LOGIN_RATE_LIMIT_IP_PER_MINUTE = 20  # Sustained login attempts per minute per client IP
+    LOGIN_RATE_LIMIT_EMAIL_BURST = 5  # Login attempts allowed in a burst per email
+    LOGIN_RATE_LIMIT_EMAIL_PER_MINUTE = 5  # Sustained login attempts per minute per email
+    # Proxies in front of the app whose X-Forwarded-For/-Proto entries are
+    # trusted for the client address: 1 for the Heroku router (DYNO is set on
+    # Heroku), 0 when clients connect directly and could forge the header
+    TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", 1 if os.getenv("DYNO") else 0))
+    # Response cache backend: SimpleCache (per worker), SQLiteCache (shared by all
+    # workers on the host; use it with more than one worker) or NullCache
+    CACHE_TYPE = os.getenv("CACHE_TYPE", 'SimpleCache')
     CACHE_DEFAULT_TIMEOUT = 300  # Cache timeout of 5 minutes
-    MAIL_SERVER = 'smtpout.secureserver.net'  # Change to your mail server
-    MAIL_PORT = 587
-    MAIL_USE_TLS = True
-    MAIL_USERNAME = os.getenv("MAIL_USERNAME")
+    CACHE_THRESHOLD = 500  # Max responses kept by the cache backend
+    EXPORT_BATCH_SIZE = 1000  # Rows fetched per round trip while streaming Excel exports
+    EXPORT_SPOOL_MAX_SIZE = 8 * 1024 * 1024  # Exports larger than this spill to a temporary file
+    EXPORT_BATCH_MAX_IDS = 1000  # Max ids per entity accepted by POST /exports/batch
+    EXPORT_BATCH_WORKERS = 4  # Sheets of a batch export prepared concurrently
+    EXPORT_CACHE_ENABLED = True
+    EXPORT_CACHE_FOLDER = os.getenv("EXPORT_CACHE_FOLDER")  # Shared by all workers (defaults to instance/export_cache)
+    EXPORT_CACHE_MAX_BYTES = int(os.getenv("EXPORT_CACHE_MAX_BYTES", 256 * 1024 * 1024))  # LRU eviction above this size
+    EXPORT_FOLDER = os.getenv("EXPORT_FOLDER")  # Where background export files are written (defaults to instance/exports)
+    EXPORT_JOB_WORKERS = int(os.getenv("EXPORT_JOB_WORKERS", 2))  # Background export threads per worker
+    EXPORT_JOB_STALE_AFTER = 600  # Seconds without a heartbeat before a running job is requeued
+    EXPORT_JOB_MAX_ATTEMPTS = 3
+    EXPORT_JOB_RETENTION = 24 * 60 * 60  # Finished jobs and their files are kept for a day
+    OUTBOX_DISPATCHER_ENABLED = os.getenv("OUTBOX_DISPATCHER_ENABLED", "true").lower() == "true"  # false: only `flask send-outbox` sends
+    OUTBOX_POLL_INTERVAL = 30  # Seconds between outbox polls when no commit wakes the dispatcher
+    OUTBOX_BATCH_SIZE = 50
+    OUTBOX_MAX_ATTEMPTS = 6
+    OUTBOX_BACKOFF_BASE = 30  # Seconds before the first retry; doubles per failed attempt
+    OUTBOX_BACKOFF_MAX = 60 * 60
+    OUTBOX_CLAIM_TIMEOUT = 300  # Seconds before a message stuck in sending is released
+    MAIL_SERVER = os.getenv("MAIL_SERVER", 'smtpout.secureserver.net')  # Change to your mail server
+    MAIL_PORT = int(os.getenv("MAIL_PORT", 587))
+    MAIL_USE_TLS = os.getenv("MAIL_USE_TLS", "true").lower() == "true"  # STARTTLS
+    MAIL_USE_SSL = os.getenv("MAIL_USE_SSL", "false").lower() == "true"  # Implicit TLS (port 465)
+    MAIL_USERNAME = os.getenv("MAIL_USERNAME")  # Unset to skip login
     MAIL_PASSWORD = os.getenv("MAIL_PASSWORD")
-    MAIL_DEFAULT_SENDER = os.getenv("MAIL_DEFAULT_SENDER")
+    MAIL_DEFAULT_SENDER = os.getenv("MAIL_DEFAULT_SENDER")  # Defaults to MAIL_USERNAME
+    MAIL_TIMEOUT = 30  # Seconds for SMTP connect and commands
+    MAIL_POOL_SIZE = int(os.getenv("MAIL_POOL_SIZE", 2))  # SMTP sessions kept open per worker
+    MAIL_POOL_MAX_IDLE = 240  # Seconds an idle session is kept; idle sessions are checked with NOOP
+    MAIL_MAX_MESSAGES_PER_CONNECTION = 100
+    NOTIFICATION_TEMPLATE_FOLDER = os.getenv("NOTIFICATION_TEMPLATE_FOLDER")  # Email templates (defaults to templates/)
+    NOTIFICATION_TEMPLATE_CACHE = os.getenv("NOTIFICATION_TEMPLATE_CACHE")  # Compiled template bytecode (defaults to instance/template_cache)
     UPLOAD_FOLDER = './uploads'
     ALLOWED_EXTENSIONS = {'pdf'}
\ No newline at end of file
@@ -0,0 +1,39 @@
+# gunicorn.conf.py
+import gc
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", 2))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+
+# Worker profile: "sync" (default) or "gthread". Threaded workers let one
+# process overlap I/O-bound requests (exports, SMTP, SQLite waits).
+worker_profile = os.getenv("GUNICORN_PROFILE", "sync")
+if worker_profile == "gthread":
+    worker_class = "gthread"
+    threads = int(os.getenv("GUNICORN_THREADS", 4))
+else:
+    worker_class = "sync"
+
+# Build the app once in the master; workers share its memory copy-on-write
+preload_app = True
+
+# Per-process response caches would serve stale data across workers
+if workers > 1:
+    os.environ.setdefault("CACHE_TYPE", "SQLiteCache")
+
+# Keep the collector from touching (and so copying) shared pages until the
+# app is loaded and frozen
+gc.disable()
+
+
+def when_ready(server):
+    from requirements.warmup import warmup
+
+    warmup(server.app.wsgi())
+    # Move everything allocated so far out of the collector's reach
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    gc.enable()
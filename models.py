@@ -1,3 +1,4 @@
+import json
 from datetime import datetime, timezone
 from requirements.__init__ import (
     db,
@@ -11,6 +12,13 @@ def get_current_utc_time():
     return datetime.now(timezone.utc)
 
 
+def serialize_value(value):
+    """
+    Serializes datetimes as ISO 8601 strings and leaves other values untouched.
+    """
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
 class Role(db.Model):
     __tablename__ = "roles"
 
@@ -40,6 +48,9 @@ class User(db.Model):
     role_id = db.Column(db.Integer, db.ForeignKey("roles.role_id"), nullable=False)
 
     role = db.relationship("Role", backref=db.backref("users", lazy=True))
+    # Bumped with every role change and carried in the "role_version" claim,
+    # so a client can tell its token's "role" claim is out of date
+    role_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
 
     def __repr__(self):
         return f"<User {self.email}, Role {self.role.role_name}>"
@@ -53,6 +64,89 @@ class User(db.Model):
         }
 
 
+class RevokedToken(db.Model):
+    __tablename__ = "revoked_tokens"
+
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(36), unique=True, nullable=False)  # Unique index gives O(1)-style lookups
+    token_type = db.Column(db.String(16), nullable=False)
+    user_id = db.Column(db.Integer, nullable=True)
+    revoked_at = db.Column(db.DateTime, default=get_current_utc_time)
+    expires_at = db.Column(db.DateTime, nullable=True, index=True)  # The token's exp; the row is pruned after it
+
+    def __repr__(self):
+        return f"<RevokedToken {self.jti}>"
+
+
+class ExportJob(db.Model):
+    __tablename__ = "export_jobs"
+
+    job_id = db.Column(db.String(36), primary_key=True)
+    entity = db.Column(db.String(50), nullable=False)
+    export_format = db.Column(db.String(10), nullable=False)
+    filters = db.Column(db.Text)  # JSON list of filter expressions
+    # queued -> running -> done | failed
+    status = db.Column(db.String(20), nullable=False, default="queued", index=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    rows_total = db.Column(db.Integer)
+    rows_written = db.Column(db.Integer, nullable=False, default=0)
+    file_path = db.Column(db.String(255))
+    error = db.Column(db.Text)
+    user_id = db.Column(db.Integer, nullable=True)
+    created_date = db.Column(db.DateTime, default=get_current_utc_time)
+    started_date = db.Column(db.DateTime)
+    finished_date = db.Column(db.DateTime)
+    # Bumped while the job runs; a running job that stops updating it is requeued
+    last_modified_date = db.Column(
+        db.DateTime, default=get_current_utc_time, onupdate=get_current_utc_time
+    )
+
+    def __repr__(self):
+        return f"<ExportJob {self.job_id} {self.status}>"
+
+    def to_dict(self):
+        return {
+            "job_id": self.job_id,
+            "entity": self.entity,
+            "format": self.export_format,
+            "filters": json.loads(self.filters or "[]"),
+            "status": self.status,
+            "attempts": self.attempts,
+            "rows_total": self.rows_total,
+            "rows_written": self.rows_written,
+            "error": self.error,
+            "created_date": serialize_value(self.created_date),
+            "started_date": serialize_value(self.started_date),
+            "finished_date": serialize_value(self.finished_date),
+        }
+
+
+class EmailOutbox(db.Model):
+    __tablename__ = "email_outbox"
+    # The dispatcher polls for pending messages that are due
+    __table_args__ = (db.Index("ix_email_outbox_due", "status", "next_attempt_at"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    to_email = db.Column(db.String(255), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    html_body = db.Column(db.Text)  # Optional HTML alternative to body
+    # pending -> sending -> sent | failed (back to pending while retries remain)
+    status = db.Column(db.String(20), nullable=False, default="pending")
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=get_current_utc_time)
+    last_error = db.Column(db.Text)
+    created_date = db.Column(db.DateTime, default=get_current_utc_time)
+    sent_date = db.Column(db.DateTime)
+    # Set when a dispatcher claims the message; a stale claim is released
+    last_modified_date = db.Column(
+        db.DateTime, default=get_current_utc_time, onupdate=get_current_utc_time
+    )
+
+    def __repr__(self):
+        return f"<EmailOutbox {self.id} {self.status}>"
+
+
 class Requirement(db.Model):
     __tablename__ = "requirements"
 
@@ -67,22 +161,29 @@ class Requirement(db.Model):
     department = db.Column(db.String(100))
     created_date = db.Column(db.DateTime, default=get_current_utc_time)
     last_modified_date = db.Column(
-        db.DateTime, default=get_current_utc_time, onupdate=get_current_utc_time
+        db.DateTime, default=get_current_utc_time, onupdate=get_current_utc_time, index=True
     )
 
-    def to_dict(self):
+    # Fields returned by to_dict() (and selectable with ?fields=)
+    SERIALIZED_FIELDS = (
+        "requirement_id",
+        "business_unit",
+        "resource_requirement",
+        "job_description",
+        "resource_type",
+        "business_title",
+        "vector_title",
+        "comments",
+        "department",
+        "created_date",
+        "last_modified_date",
+    )
+
+    def to_dict(self, fields=None):
+        # Only touch the requested attributes so deferred columns are never loaded
         return {
-            "requirement_id": self.requirement_id,
-            "business_unit": self.business_unit,
-            "resource_requirement": self.resource_requirement,
-            "job_description": self.job_description,
-            "resource_type": self.resource_type,
-            "business_title": self.business_title,
-            "vector_title": self.vector_title,
-            "comments": self.comments,
-            "department": self.department,
-            "created_date": self.created_date.isoformat(),
-            "last_modified_date": self.last_modified_date.isoformat(),
+            name: serialize_value(getattr(self, name))
+            for name in fields or self.SERIALIZED_FIELDS
         }
 
 
@@ -92,7 +193,7 @@ class RequirementApproval(db.Model):
     approval_id = db.Column(db.Integer, primary_key=True, autoincrement=True, nullable=True)
 
     requirement_id = db.Column(
-        db.Integer, db.ForeignKey("requirements.requirement_id"), nullable=False
+        db.Integer, db.ForeignKey("requirements.requirement_id"), nullable=False, index=True
     )
     approval_status = db.Column(db.String(50))
     approved_by = db.Column(db.String(100))
@@ -106,7 +207,7 @@ class InterviewStatus(db.Model):
 
     interview_id = db.Column(db.Integer, autoincrement=True, primary_key=True, nullable=True)
     requirement_id = db.Column(
-        db.Integer, db.ForeignKey("requirements.requirement_id"), nullable=False
+        db.Integer, db.ForeignKey("requirements.requirement_id"), nullable=False, index=True
     )
     interview_status = db.Column(db.String(50))  # Pending, Hold, Approved, Rejected
     interview_round = db.Column(db.String(50))  # Preliminary, Final, HR Round
@@ -114,18 +215,26 @@ class InterviewStatus(db.Model):
     interviewer_name = db.Column(db.String(100), nullable=True)  # New field
     interview_date = db.Column(db.DateTime, nullable=True)  # New field
     last_modified_date = db.Column(
-        db.DateTime, default=get_current_utc_time, onupdate=get_current_utc_time
+        db.DateTime, default=get_current_utc_time, onupdate=get_current_utc_time, index=True
     )
 
-    def to_dict(self):
+    # Fields returned by to_dict() (and selectable with ?fields=)
+    SERIALIZED_FIELDS = (
+        "interview_id",
+        "requirement_id",
+        "interview_status",
+        "interview_round",
+        "candidate_name",
+        "interviewer_name",
+        "interview_date",
+        "last_modified_date",
+    )
+
+    def to_dict(self, fields=None):
+        # Only touch the requested attributes so deferred columns are never loaded
         return {
-            'requirement_id': self.requirement_id,
-            'interview_status': self.interview_status,
-            'interview_round': self.interview_round,
-            'candidate_name': self.candidate_name,
-            'interviewer_name': self.interviewer_name,
-            'interview_date': self.interview_date.isoformat() if self.interview_date else None,
-            'last_modified_date': self.last_modified_date.isoformat(),
+            name: serialize_value(getattr(self, name))
+            for name in fields or self.SERIALIZED_FIELDS
         }
 
 
@@ -135,39 +244,50 @@ class Joining(db.Model):
     employee_id = db.Column(db.Integer, primary_key=True)
     first_name = db.Column(db.String(100))
     last_name = db.Column(db.String(100))
-    emp_email_id = db.Column(db.String(100))
+    emp_email_id = db.Column(db.String(100), index=True)
     employee_address = db.Column(db.String(255))
     business_unit = db.Column(db.String(100))
     business_title = db.Column(db.String(100))
     resource_type = db.Column(db.String(50))  # Full Time / Contract
     contact_number = db.Column(db.String(50))
     reporting_manager = db.Column(db.String(100))
-    employment_status = db.Column(db.String(50))  # Active / Inactive
+    employment_status = db.Column(db.String(50), index=True)  # Active / Inactive
     created_date = db.Column(db.DateTime, default=get_current_utc_time)
     last_modified_date = db.Column(
-        db.DateTime, default=get_current_utc_time, onupdate=get_current_utc_time
+        db.DateTime, default=get_current_utc_time, onupdate=get_current_utc_time, index=True
     )
 
-    def to_dict(self):
+    # Fields returned by to_dict() (and selectable with ?fields=)
+    SERIALIZED_FIELDS = (
+        "employee_id",
+        "first_name",
+        "last_name",
+        "emp_email_id",
+        "employee_address",
+        "business_unit",
+        "business_title",
+        "resource_type",
+        "contact_number",
+        "reporting_manager",
+        "employment_status",
+        "created_date",
+        "last_modified_date",
+    )
+
+    def to_dict(self, fields=None):
+        # Only touch the requested attributes so deferred columns are never loaded
         return {
-            "employee_id": self.employee_id,
-            "first_name": self.first_name,
-            "last_name": self.last_name,
-            "emp_email_id": self.emp_email_id,
-            "employee_address": self.employee_address,
-            "business_unit": self.business_unit,
-            "business_title": self.business_title,
-            "resource_type": self.resource_type,
-            "contact_number": self.contact_number,
-            "reporting_manager": self.reporting_manager,
-            "employment_status": self.employment_status,
-            "created_date": self.created_date.isoformat(),
-            "last_modified_date": self.last_modified_date.isoformat(),
+            name: serialize_value(getattr(self, name))
+            for name in fields or self.SERIALIZED_FIELDS
         }
 
 
 class ITAssets(db.Model):
     __tablename__ = "it_assets"
+    __table_args__ = (
+        # Serves lookups by employee_id as well as per-employee listings by date
+        db.Index("ix_it_assets_employee_id_created_date", "employee_id", "created_date"),
+    )
 
     asset_id = db.Column(
         db.Integer, primary_key=True
@@ -183,7 +303,7 @@ class ITAssets(db.Model):
     employment_status = db.Column(db.String(50), nullable=False)
     created_date = db.Column(db.DateTime, default=get_current_utc_time)
     last_modified_date = db.Column(
-        db.DateTime, default=get_current_utc_time, onupdate=get_current_utc_time
+        db.DateTime, default=get_current_utc_time, onupdate=get_current_utc_time, index=True
     )
 
     def __init__(
@@ -211,9 +331,35 @@ class ITAssets(db.Model):
     def __repr__(self):
         return f"<ITAsset {self.asset_id}>"
 
+    # Fields returned by to_dict() (and selectable with ?fields=)
+    SERIALIZED_FIELDS = (
+        "asset_id",
+        "employee_id",
+        "laptop",
+        "monitor",
+        "wired_keyboard",
+        "wired_mouse",
+        "wireless_mouse",
+        "airtel_dongle",
+        "id_card",
+        "employment_status",
+        "created_date",
+        "last_modified_date",
+    )
+
+    def to_dict(self, fields=None):
+        # Dates are left as datetimes; jsonify renders them as HTTP dates
+        return {name: getattr(self, name) for name in fields or self.SERIALIZED_FIELDS}
+
 
 class SoftwareLicense(db.Model):
     __tablename__ = "software_licenses"
+    __table_args__ = (
+        # Serves lookups by employee_id as well as per-employee listings by date
+        db.Index(
+            "ix_software_licenses_employee_id_created_date", "employee_id", "created_date"
+        ),
+    )
 
     license_id = db.Column(db.Integer, primary_key=True)
     employee_id = db.Column(
@@ -221,19 +367,41 @@ class SoftwareLicense(db.Model):
     )
     created_date = db.Column(db.DateTime, default=get_current_utc_time)
     last_modified_date = db.Column(
-        db.DateTime, default=get_current_utc_time, onupdate=get_current_utc_time
+        db.DateTime, default=get_current_utc_time, onupdate=get_current_utc_time, index=True
     )
     dynamic_attributes = db.relationship(
         "LicenseAttribute", backref="software_license", lazy=True
     )
 
+    # Fields returned by to_dict() (and selectable with ?fields=)
+    SERIALIZED_FIELDS = (
+        "license_id",
+        "employee_id",
+        "created_date",
+        "last_modified_date",
+        "attributes",
+    )
+
+    def to_dict(self, fields=None):
+        # Dates are left as datetimes; jsonify renders them as HTTP dates
+        data = {}
+        for name in fields or self.SERIALIZED_FIELDS:
+            if name == "attributes":
+                data[name] = [
+                    {"attribute_name": attr.attribute_name, "attribute_value": attr.attribute_value}
+                    for attr in self.dynamic_attributes
+                ]
+            else:
+                data[name] = getattr(self, name)
+        return data
+
 
 class LicenseAttribute(db.Model):
     __tablename__ = "license_attributes"
 
     attribute_id = db.Column(db.Integer, primary_key=True)
     license_id = db.Column(
-        db.Integer, db.ForeignKey("software_licenses.license_id"), nullable=False
+        db.Integer, db.ForeignKey("software_licenses.license_id"), nullable=False, index=True
     )
     attribute_name = db.Column(db.String(100))
     attribute_value = db.Column(db.String(255))
@@ -1,10 +1,12 @@
 # backend/__init__.py
-from flask import Flask
+from flask import Flask, jsonify
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
 from config import Config
+from requirements.database import configure_engine
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 # Initialize the extensions
 db = SQLAlchemy()
@@ -22,11 +24,39 @@ def create_app():
     # Load configurations from the config.py file
     app.config.from_object(Config)
 
+    # Behind a proxy remote_addr is the proxy's address; take the client's
+    # (used by the per-IP login limit) from the trusted X-Forwarded-For hops
+    hops = app.config.get("TRUSTED_PROXY_HOPS", 0)
+    if hops:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
+
     # Initialize extensions
     db.init_app(app)
+    configure_engine(app, db)
     migrate.init_app(app, db)
     jwt.init_app(app)
 
+    from requirements.identity import init_identity_cache
+    from requirements.hashing import hashing
+    from requirements.ratelimit import login_limiter
+    from requirements.cache import response_cache
+    from requirements.export_cache import export_cache
+    from requirements.export_jobs import export_jobs
+    from requirements.mail import mail_transport
+    from requirements.notifications import notifications
+    from requirements.outbox import email_dispatcher
+    import requirements.tokens  # noqa: F401  registers the token revocation check
+
+    init_identity_cache(app)
+    hashing.configure(app)
+    login_limiter.configure(app)
+    response_cache.init_app(app)
+    export_cache.configure(app)
+    export_jobs.configure(app)
+    mail_transport.configure(app)
+    notifications.configure(app)
+    email_dispatcher.configure(app)
+
     # Initialize CORS (Allow specific origins for development)
     CORS(
         app,
@@ -48,6 +78,7 @@ def create_app():
         joining,
         assets,
         licenses,
+        exports,
         login,
         users,
     )
@@ -63,6 +94,7 @@ def create_app():
     app.register_blueprint(joining.joining_bp, url_prefix="/")
     app.register_blueprint(assets.assets_bp, url_prefix="/")
     app.register_blueprint(licenses.licenses_bp, url_prefix="/")
+    app.register_blueprint(exports.exports_bp, url_prefix="/")
 
     # Register user and login blueprints
     app.register_blueprint(users.user_bp, url_prefix="/users")
@@ -71,4 +103,24 @@ def create_app():
     )  # Register role assignment blueprint
     app.register_blueprint(login.login_bp, url_prefix="/")
 
+    # Invalid list parameters (sort, limit, cursor, ...) become 400 responses
+    from requirements.listing import QueryParameterError
+
+    @app.errorhandler(QueryParameterError)
+    def handle_query_parameter_error(e):
+        return jsonify({"message": str(e)}), 400
+
+    # Register CLI commands
+    from requirements.query_plans import check_query_plans_command
+    from requirements.startup_report import startup_report_command
+    from requirements.outbox import send_outbox_command
+    from requirements.notifications import send_requirement_digest_command
+    from requirements.tokens import prune_revoked_tokens_command
+
+    app.cli.add_command(check_query_plans_command)
+    app.cli.add_command(startup_report_command)
+    app.cli.add_command(send_outbox_command)
+    app.cli.add_command(send_requirement_digest_command)
+    app.cli.add_command(prune_revoked_tokens_command)
+
     return app
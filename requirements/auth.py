@@ -1,8 +1,41 @@
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt_identity, current_user
 from functools import wraps
 from flask import Blueprint, request, jsonify, abort
 from models import db, User, Role  # Ensure that User and Role models are imported
 from werkzeug.security import generate_password_hash, check_password_hash
+from requirements.identity import identity_cache
+from requirements.cache import response_cache
+from requirements.export_cache import export_cache
+from requirements.ratelimit import login_limiter
+
+
+def change_role(user, role):
+    """
+    Moves a user to a role. The user's role_version (carried in the tokens
+    it is issued) is bumped in the same transaction; committing the change
+    also invalidates the user's cached identity in every worker, so the new
+    role is enforced on the user's next request.
+    """
+    if user.role_id != role.role_id:
+        user.role_id = role.role_id
+        user.role_version = User.role_version + 1
+
+
+def has_role(roles):
+    """
+    Returns whether the current user holds one of the given roles.
+
+    The role comes from the user's cached identity, which flask_jwt_extended
+    loads for every protected request anyway (see requirements.identity):
+    once cached it costs a read of the shared identity state and no database
+    query, and every worker re-reads it after a change to the user commits.
+    """
+    identity = current_user
+    if identity is None:
+        return False
+
+    # Ensure the user has a role and check if the role matches the allowed roles
+    return identity.role_name in roles
 
 
 def role_required(roles):
@@ -14,11 +47,7 @@ def role_required(roles):
     def wrapper(fn):
         @wraps(fn)
         def wrapped(*args, **kwargs):
-            user_id = get_jwt_identity()  # This should return the user ID from the JWT
-            user = User.query.get(user_id)  # Fetch user from the database
-
-            # Ensure the user has a role and check if the role matches the allowed roles
-            if user and user.role and user.role.role_name in roles:
+            if has_role(roles):
                 return fn(*args, **kwargs)
 
             return {"msg": "Permission denied"}, 403
@@ -53,7 +82,7 @@ def assign_role(user_id):
         return jsonify({"message": "User not found"}), 404
 
     # Assign the role to the user
-    user.role_id = role.role_id
+    change_role(user, role)
     db.session.commit()
 
     return (
@@ -69,11 +98,39 @@ def admin_only():
     """
     Example endpoint that only allows access to Admin users.
     """
-    current_user = get_jwt_identity()  # Get the current user's identity from the JWT
-
     # Ensure the current user is an Admin
-    user = User.query.get(current_user)
-    if user and user.role.role_name != "Admin":
+    if current_user and current_user.role_name != "Admin":
         abort(403, description="Access denied. Admins only.")
 
     return jsonify({"message": "This is an Admin-only endpoint."}), 200
+
+
+# Cache statistics (Admin only)
+@user_routes.route("/cache-stats", methods=["GET"])
+@jwt_required()
+@role_required(roles=["Admin", "Super-Admin"])
+def cache_stats():
+    """
+    Reports hit/miss counters of this worker's caches.
+    """
+    return (
+        jsonify(
+            {
+                "identity": identity_cache.stats(),
+                "responses": response_cache.stats(),
+                "exports": export_cache.stats(),
+            }
+        ),
+        200,
+    )
+
+
+# Login rate limiter counters, shared by all workers (Admin only)
+@user_routes.route("/rate-limit-stats", methods=["GET"])
+@jwt_required()
+@role_required(roles=["Admin", "Super-Admin"])
+def rate_limit_stats():
+    """
+    Reports allowed and rejected login attempts across all workers.
+    """
+    return jsonify({"login": login_limiter.stats()}), 200
@@ -0,0 +1,311 @@
+import hashlib
+import logging
+import pickle
+import sqlite3
+import threading
+import time
+from functools import wraps
+from flask import g, request, make_response
+from flask_jwt_extended import get_jwt
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from requirements.ttl_cache import TTLCache
+from requirements.shared_state import SharedState
+
+logger = logging.getLogger(__name__)
+
+
+class SimpleCacheBackend:
+    """
+    In-process backend: an LRU+TTL dict plus per-table generation counters.
+    Each worker has its own copy.
+    """
+
+    def __init__(self, app):
+        self._entries = TTLCache(
+            maxsize=app.config.get("CACHE_THRESHOLD", 500),
+            ttl=app.config.get("CACHE_DEFAULT_TIMEOUT", 300),
+        )
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        return self._entries.get(key)
+
+    def set(self, key, value, timeout=None):
+        self._entries.set(key, value, ttl=timeout)
+
+    def generations(self, tables):
+        return [self._generations.get(table, 0) for table in tables]
+
+    def bump(self, tables):
+        with self._lock:
+            for table in tables:
+                self._generations[table] = self._generations.get(table, 0) + 1
+
+    def clear(self):
+        self._entries.clear()
+
+
+class SQLiteCacheBackend:
+    """
+    Backend shared by every worker on the host, stored in a WAL-mode SQLite
+    file. Generation counters live in the same file, so a write committed by
+    one worker invalidates the cached responses of all workers at once.
+    Errors are treated as cache misses so the API keeps working without it.
+    """
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS cache_entries (
+        key TEXT PRIMARY KEY,
+        value BLOB NOT NULL,
+        expires_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS ix_cache_entries_expires_at ON cache_entries (expires_at);
+    CREATE TABLE IF NOT EXISTS cache_generations (
+        name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL
+    );
+    """
+
+    # Expired and surplus entries are pruned every this many writes
+    PRUNE_EVERY = 200
+
+    def __init__(self, app):
+        self.store = SharedState("cache.db", self._SCHEMA)
+        self.store.configure(app)
+        self.threshold = app.config.get("CACHE_THRESHOLD", 500)
+        self.timeout = app.config.get("CACHE_DEFAULT_TIMEOUT", 300)
+        self._writes = 0
+
+    def get(self, key):
+        try:
+            row = self.store.connection().execute(
+                "SELECT value FROM cache_entries WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            ).fetchone()
+        except sqlite3.Error:
+            logger.exception("Shared cache read failed")
+            return None
+        return pickle.loads(row[0]) if row else None
+
+    def set(self, key, value, timeout=None):
+        expires_at = time.time() + (self.timeout if timeout is None else timeout)
+        try:
+            self.store.connection().execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), expires_at),
+            )
+        except sqlite3.Error:
+            logger.exception("Shared cache write failed")
+            return
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            self._prune()
+
+    def generations(self, tables):
+        try:
+            placeholders = ",".join("?" for _ in tables)
+            rows = self.store.connection().execute(
+                f"SELECT name, version FROM cache_generations WHERE name IN ({placeholders})",
+                list(tables),
+            ).fetchall()
+        except sqlite3.Error:
+            logger.exception("Shared cache read failed")
+            # Unique, never-stored generation: forces a miss rather than a stale hit
+            return [f"error-{time.time()}"]
+        versions = dict(rows)
+        return [versions.get(table, 0) for table in tables]
+
+    def bump(self, tables):
+        try:
+            conn = self.store.connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "INSERT INTO cache_generations (name, version) VALUES (?, 1) "
+                    "ON CONFLICT(name) DO UPDATE SET version = version + 1",
+                    [(table,) for table in tables],
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error:
+            logger.exception("Shared cache invalidation failed; clearing entries")
+            self.clear()
+
+    def clear(self):
+        try:
+            self.store.connection().execute("DELETE FROM cache_entries")
+        except sqlite3.Error:
+            logger.exception("Shared cache clear failed")
+
+    def _prune(self):
+        try:
+            conn = self.store.connection()
+            conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (time.time(),))
+            # Keep at most `threshold` entries, dropping the ones closest to expiry
+            conn.execute(
+                "DELETE FROM cache_entries WHERE key IN ("
+                "SELECT key FROM cache_entries ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                (self.threshold,),
+            )
+        except sqlite3.Error:
+            logger.exception("Shared cache prune failed")
+
+
+class NullCacheBackend:
+    """
+    Backend that never stores anything (CACHE_TYPE = 'NullCache').
+    """
+
+    def __init__(self, app):
+        pass
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, timeout=None):
+        pass
+
+    def generations(self, tables):
+        return [0 for _ in tables]
+
+    def bump(self, tables):
+        pass
+
+    def clear(self):
+        pass
+
+
+BACKENDS = {
+    "SimpleCache": SimpleCacheBackend,
+    "SQLiteCache": SQLiteCacheBackend,
+    "NullCache": NullCacheBackend,
+}
+
+
+class ResponseCache:
+    """
+    Caches GET responses keyed by endpoint, arguments, query string and the
+    caller's role. Keys embed a generation number per table the endpoint reads;
+    committing a write to one of those tables bumps its generation, so stale
+    entries are never served and simply age out of the backend. Views behind
+    conditional_list / conditional_detail also key on the ETag computed for
+    the request, so a body is only ever served under the tag it was built for.
+    """
+
+    def __init__(self):
+        self.backend = NullCacheBackend(None)
+        self.timeout = 300
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        cache_type = app.config.get("CACHE_TYPE", "SimpleCache")
+        if cache_type not in BACKENDS:
+            raise ValueError(f"Unknown CACHE_TYPE '{cache_type}'")
+        self.backend = BACKENDS[cache_type](app)
+        self.timeout = app.config.get("CACHE_DEFAULT_TIMEOUT", 300)
+
+    def invalidate(self, tables):
+        if tables:
+            self.backend.bump(sorted(tables))
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": type(self.backend).__name__,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _key(self, tables, view_args):
+        parts = [
+            request.endpoint,
+            repr(sorted(view_args.items())),
+            repr(sorted(request.args.items(multi=True))),
+            str(get_jwt().get("role")),
+            repr(self.backend.generations(tables)),
+            # Set by the conditional_* validators from a live table_version();
+            # the backend generations alone are per process with SimpleCache
+            str(g.get("response_version")),
+        ]
+        return "response:" + hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+    def cached(self, *models, timeout=None):
+        """
+        Decorator for GET views that read the tables of the given models.
+        """
+        tables = sorted(model.__tablename__ for model in models)
+
+        def decorator(fn):
+            @wraps(fn)
+            def wrapped(*args, **kwargs):
+                key = self._key(tables, kwargs)
+                entry = self.backend.get(key)
+                self._count(entry is not None)
+                if entry is not None:
+                    body, status, mimetype = entry
+                    response = make_response(body, status)
+                    response.mimetype = mimetype
+                    return response
+
+                response = make_response(fn(*args, **kwargs))
+                if response.status_code == 200 and not response.is_streamed:
+                    self.backend.set(
+                        key,
+                        (response.get_data(), response.status_code, response.mimetype),
+                        timeout if timeout is not None else self.timeout,
+                    )
+                return response
+
+            return wrapped
+
+        return decorator
+
+
+response_cache = ResponseCache()
+
+
+# Invalidation: collect the tables written during a flush (or by bulk
+# UPDATE/DELETE statements) and bump their generations once committed.
+@event.listens_for(Session, "after_flush")
+def _collect_changed_tables(session, flush_context):
+    changed = session.info.setdefault("changed_tables", set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        table = getattr(obj, "__tablename__", None)
+        if table:
+            changed.add(table)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_changes(orm_execute_state):
+    state = orm_execute_state
+    if state.bind_mapper is None:
+        return
+    if state.is_insert or state.is_update or state.is_delete:
+        state.session.info.setdefault("changed_tables", set()).add(
+            state.bind_mapper.local_table.name
+        )
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_tables(session):
+    response_cache.invalidate(session.info.pop("changed_tables", None))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_tables(session):
+    session.info.pop("changed_tables", None)
@@ -0,0 +1,112 @@
+import hashlib
+from datetime import timezone
+from functools import wraps
+from flask import g, request, make_response
+from sqlalchemy import func, inspect
+from requirements.__init__ import db
+
+
+def _as_utc(value):
+    # SQLite hands back naive datetimes; they are stored in UTC
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def table_version(model):
+    """
+    Returns (row count, max(last_modified_date)) for a table with one aggregate
+    query. Inserts and deletes change the count, updates move the timestamp.
+    """
+    count, last_modified = db.session.query(
+        func.count(), func.max(model.last_modified_date)
+    ).select_from(model).one()
+    return count, _as_utc(last_modified)
+
+
+def _make_etag(*parts):
+    # The query string is part of the tag: filters, sort and fields change the body
+    raw = "|".join(str(part) for part in parts + (request.endpoint, request.query_string.decode()))
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _not_modified(etag, last_modified, use_modified_since=True):
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if use_modified_since and last_modified and request.if_modified_since:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since
+    return False
+
+
+def _conditional(fn, validators, use_modified_since=True):
+    @wraps(fn)
+    def wrapped(*args, **kwargs):
+        found = validators(**kwargs)
+        if found is None:
+            # Nothing to validate against (e.g. unknown id); let the view answer
+            return fn(*args, **kwargs)
+
+        etag, last_modified = found
+        # The response cache keys on this too, so the body served under the
+        # tag was built from the same version of the data (see cache.py)
+        g.response_version = etag
+        if _not_modified(etag, last_modified, use_modified_since):
+            response = make_response("", 304)
+        else:
+            response = make_response(fn(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+        response.set_etag(etag, weak=True)
+        if last_modified:
+            response.last_modified = last_modified
+        return response
+
+    return wrapped
+
+
+def conditional_list(model):
+    """
+    Adds weak ETag / Last-Modified validators to a list endpoint, derived from
+    table_version(). A matching If-None-Match returns 304 before the view runs,
+    i.e. before any rows are loaded or serialized.
+
+    If-Modified-Since is not honoured on its own here because a deleted row
+    does not move max(last_modified_date); the ETag covers deletes.
+    """
+
+    def validators(**kwargs):
+        count, last_modified = table_version(model)
+        return _make_etag(model.__tablename__, count, last_modified), last_modified
+
+    def decorator(fn):
+        return _conditional(fn, validators, use_modified_since=False)
+
+    return decorator
+
+
+def conditional_detail(model, id_arg="id"):
+    """
+    Adds weak ETag / Last-Modified validators to a detail endpoint, derived from
+    the row's own last_modified_date (a single-column primary key lookup).
+    """
+    primary_key = inspect(model).primary_key[0]
+
+    def validators(**kwargs):
+        row_id = kwargs[id_arg]
+        last_modified = (
+            db.session.query(model.last_modified_date)
+            .filter(primary_key == row_id)
+            .first()
+        )
+        if last_modified is None:
+            return None
+        last_modified = _as_utc(last_modified[0])
+        return _make_etag(model.__tablename__, row_id, last_modified), last_modified
+
+    def decorator(fn):
+        return _conditional(fn, validators)
+
+    return decorator
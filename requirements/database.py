@@ -0,0 +1,24 @@
+from sqlalchemy import event
+
+
+def configure_engine(app, db):
+    """
+    Applies the configured SQLite pragmas on every new DBAPI connection.
+    WAL lets readers proceed while a writer commits, which matters once
+    several gunicorn workers share one database file.
+    """
+    pragmas = app.config.get("SQLITE_PRAGMAS") or {}
+
+    with app.app_context():
+        engine = db.engine
+        if engine.dialect.name != "sqlite" or not pragmas:
+            return
+
+        @event.listens_for(engine, "connect")
+        def _set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            try:
+                for name, value in pragmas.items():
+                    cursor.execute(f"PRAGMA {name}={value}")
+            finally:
+                cursor.close()
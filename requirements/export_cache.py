@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+
+
+class ExportCache:
+    """
+    Keeps generated export files on disk so unchanged data is served with a
+    sendfile instead of being rebuilt. Keys include the table version (row
+    count and max(last_modified_date)), so any write to the table makes new
+    requests miss. Files are evicted least recently used first once their
+    total size exceeds max_bytes. The folder can be shared by all workers:
+    files are written under a temporary name and renamed into place.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.enabled = True
+        self.folder = None
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def configure(self, app):
+        self.enabled = app.config.get("EXPORT_CACHE_ENABLED", self.enabled)
+        self.max_bytes = app.config.get("EXPORT_CACHE_MAX_BYTES", self.max_bytes)
+        self.folder = app.config.get("EXPORT_CACHE_FOLDER") or os.path.join(
+            app.instance_path, "export_cache"
+        )
+
+    def key(self, *parts):
+        raw = json.dumps(parts, default=str, sort_keys=True)
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.folder, key)
+
+    def get(self, key):
+        """
+        Returns the path of a cached file, or None. A hit refreshes the file's
+        mtime, which is what eviction orders by.
+        """
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._misses += 1
+            return None
+        with self._lock:
+            self._hits += 1
+        return path
+
+    @contextmanager
+    def writer(self, key):
+        """
+        Yields a binary file to write an entry into. The entry becomes visible
+        only once the block completes; on error the partial file is removed.
+        """
+        os.makedirs(self.folder, exist_ok=True)
+        path = self.path(key)
+        partial = f"{path}.{uuid.uuid4().hex}.part"
+        try:
+            with open(partial, "wb") as fileobj:
+                yield fileobj
+            os.replace(partial, path)
+        except BaseException:
+            if os.path.exists(partial):
+                os.remove(partial)
+            raise
+        self.evict(keep=path)
+
+    def tee(self, key, chunks):
+        """
+        Passes byte chunks through while writing them to the cache. An entry is
+        only stored if the whole stream was consumed (not on client disconnect).
+        """
+        with self.writer(key) as fileobj:
+            for chunk in chunks:
+                fileobj.write(chunk)
+                yield chunk
+
+    def evict(self, keep=None):
+        """
+        Removes the least recently used entries until the cache fits max_bytes.
+        The entry at keep (the one just written) is never removed.
+        """
+        entries = []
+        for entry in os.scandir(self.folder):
+            if entry.is_file() and not entry.name.endswith(".part"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # Another worker evicted it first
+            total -= size
+
+    def stats(self):
+        size = 0
+        files = 0
+        if self.folder and os.path.isdir(self.folder):
+            for entry in os.scandir(self.folder):
+                if entry.is_file() and not entry.name.endswith(".part"):
+                    size += entry.stat().st_size
+                    files += 1
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "files": files,
+                "bytes": size,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+export_cache = ExportCache()
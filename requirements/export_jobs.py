@@ -0,0 +1,213 @@
+import json
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from sqlalchemy import func, select, update
+from requirements.__init__ import db
+from requirements.exports import EXPORTS, export_filename, iter_frames, write_export
+from requirements.listing import apply_filters
+from requirements.workers import PerProcess, claim, requeue_stale
+from models import ExportJob, get_current_utc_time
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class ExportJobRunner:
+    """
+    Builds export files in the background so large exports do not hold a
+    request worker. Job state lives in the export_jobs table: a job is claimed
+    with a compare-and-set on its status, so several workers (or processes)
+    can share the queue, and a running job whose heartbeat goes stale (its
+    worker died or was restarted) is requeued.
+    """
+
+    def __init__(self, workers=2, stale_after=600, max_attempts=3, retention=86400):
+        self.workers = workers
+        self.stale_after = stale_after
+        self.max_attempts = max_attempts
+        self.retention = retention
+        self.folder = None
+        self._app = None
+        self._pool = PerProcess(self._start_pool)
+
+    def configure(self, app):
+        self.workers = app.config.get("EXPORT_JOB_WORKERS", self.workers)
+        self.stale_after = app.config.get("EXPORT_JOB_STALE_AFTER", self.stale_after)
+        self.max_attempts = app.config.get("EXPORT_JOB_MAX_ATTEMPTS", self.max_attempts)
+        self.retention = app.config.get("EXPORT_JOB_RETENTION", self.retention)
+        self.folder = app.config.get("EXPORT_FOLDER") or os.path.join(
+            app.instance_path, "exports"
+        )
+        self._app = app
+
+    def enqueue(self, entity, export_format, filters=(), user_id=None):
+        """
+        Records a queued job and hands it to the pool. Returns the job.
+        """
+        job = ExportJob(
+            job_id=str(uuid.uuid4()),
+            entity=entity,
+            export_format=export_format,
+            filters=json.dumps(list(filters)),
+            status=QUEUED,
+            user_id=user_id,
+        )
+        db.session.add(job)
+        db.session.commit()
+
+        self.ensure_started()
+        self._pool.get().submit(self._run, job.job_id)
+        return job
+
+    def ensure_started(self):
+        """
+        Starts this process's pool on first use and picks up jobs left behind
+        by a previous worker.
+        """
+        if not self._pool.exists():
+            self.recover()
+
+    def is_stale(self, job):
+        if job.status != RUNNING or job.last_modified_date is None:
+            return False
+        heartbeat = job.last_modified_date.replace(tzinfo=None)
+        now = get_current_utc_time().replace(tzinfo=None)
+        return now - heartbeat > timedelta(seconds=self.stale_after)
+
+    def recover(self):
+        """
+        Requeues running jobs whose heartbeat went stale (or fails them once
+        they ran out of attempts) and submits every queued job to the pool.
+        """
+        requeue_stale(
+            ExportJob,
+            RUNNING,
+            QUEUED,
+            FAILED,
+            self.stale_after,
+            self.max_attempts,
+            failed_values={"error": "Export was interrupted", "finished_date": get_current_utc_time()},
+        )
+        self.prune()
+
+        queued = db.session.scalars(
+            select(ExportJob.job_id)
+            .where(ExportJob.status == QUEUED)
+            .order_by(ExportJob.created_date)
+        ).all()
+        pool = self._pool.get()
+        for job_id in queued:
+            pool.submit(self._run, job_id)
+
+    def prune(self):
+        """
+        Deletes finished jobs, and their files, older than the retention period.
+        """
+        cutoff = get_current_utc_time() - timedelta(seconds=self.retention)
+        expired = db.session.scalars(
+            select(ExportJob).where(
+                ExportJob.status.in_([DONE, FAILED]), ExportJob.finished_date < cutoff
+            )
+        ).all()
+        for job in expired:
+            if job.file_path and os.path.exists(job.file_path):
+                os.remove(job.file_path)
+            db.session.delete(job)
+        db.session.commit()
+
+    def download_name(self, job):
+        return export_filename(EXPORTS[job.entity].filename, job.export_format)
+
+    def _run(self, job_id):
+        with self._app.app_context():
+            try:
+                self._build(job_id)
+            finally:
+                db.session.remove()
+
+    def _claim(self, job_id):
+        return claim(
+            ExportJob, job_id, QUEUED, RUNNING, rows_written=0, started_date=get_current_utc_time()
+        )
+
+    def _heartbeat(self, job_id, **values):
+        # Written on its own connection so it does not disturb the open read cursor
+        with db.engine.begin() as connection:
+            connection.execute(
+                update(ExportJob)
+                .where(ExportJob.job_id == job_id, ExportJob.status == RUNNING)
+                .values(last_modified_date=get_current_utc_time(), **values)
+            )
+
+    def _build(self, job_id):
+        if not self._claim(job_id):
+            return
+
+        job = db.session.get(ExportJob, job_id)
+        path = os.path.join(self.folder, f"{job.job_id}.{job.export_format}")
+        partial = path + ".part"
+        try:
+            from routes.exports import EXPORT_FILTERS
+
+            spec = EXPORTS[job.entity]
+            statement = apply_filters(
+                spec.statement(), EXPORT_FILTERS[job.entity], json.loads(job.filters or "[]")
+            )
+            rows_total = db.session.scalar(
+                select(func.count()).select_from(statement.order_by(None).subquery())
+            )
+            self._heartbeat(job_id, rows_total=rows_total)
+
+            progress = {"rows_written": 0}
+            os.makedirs(self.folder, exist_ok=True)
+            with open(partial, "wb") as fileobj:
+                write_export(
+                    job.export_format,
+                    spec.headers,
+                    self._track(job_id, iter_frames(spec, statement), progress),
+                    fileobj,
+                    spec.sheet_name,
+                )
+            os.replace(partial, path)
+
+            db.session.execute(
+                update(ExportJob)
+                .execution_options(synchronize_session=False)
+                .where(ExportJob.job_id == job_id)
+                .values(
+                    status=DONE,
+                    rows_written=progress["rows_written"],
+                    file_path=path,
+                    finished_date=get_current_utc_time(),
+                )
+            )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            if os.path.exists(partial):
+                os.remove(partial)
+            db.session.execute(
+                update(ExportJob)
+                .execution_options(synchronize_session=False)
+                .where(ExportJob.job_id == job_id)
+                .values(status=FAILED, error=str(e), finished_date=get_current_utc_time())
+            )
+            db.session.commit()
+            self._app.logger.exception("Export job %s failed", job_id)
+
+    def _track(self, job_id, frames, progress):
+        # Reports progress (and keeps the heartbeat fresh) after every frame
+        for frame in frames:
+            yield frame
+            progress["rows_written"] += len(frame)
+            self._heartbeat(job_id, rows_written=progress["rows_written"])
+
+    def _start_pool(self):
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="export-job")
+
+
+export_jobs = ExportJobRunner()
@@ -0,0 +1,474 @@
+import csv
+import io
+import tempfile
+import zlib
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from flask import (
+    Response,
+    current_app,
+    jsonify,
+    request,
+    send_file,
+    stream_with_context,
+)
+from sqlalchemy import DateTime, String, inspect, select, type_coerce
+from requirements.__init__ import db
+from requirements.listing import QueryParameterError, apply_filters
+from requirements.conditional import table_version
+from requirements.export_cache import export_cache
+from models import (
+    Requirement,
+    Joining,
+    ITAssets,
+    SoftwareLicense,
+    LicenseAttribute,
+)
+
+# pandas, numpy and openpyxl are imported inside the functions that use them:
+# together they add a noticeable amount of startup time and memory to every
+# worker, and most workers never serve an export.
+
+XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# One exported column: its header, the SQL column it reads and an optional formatter
+ExportColumn = namedtuple("ExportColumn", ["header", "column", "formatter"], defaults=[None])
+
+
+def iso_dates(series):
+    """
+    Vectorized datetime.isoformat() for a datetime column (NULLs stay None).
+    Other columns are returned unchanged.
+    """
+    import numpy as np
+    import pandas as pd
+
+    if not pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    values = series.to_numpy(dtype="datetime64[us]")
+    # isoformat() only shows microseconds when there are some
+    text = np.where(
+        values.astype("datetime64[s]") == values,
+        np.datetime_as_string(values, unit="s"),
+        np.datetime_as_string(values, unit="us"),
+    ).astype(object)
+    text[np.isnat(values)] = None
+    return pd.Series(text, index=series.index, name=series.name)
+
+
+class ExportSpec:
+    """
+    Describes how an entity is exported: the columns to select (read straight
+    from the database, without hydrating ORM objects), joins, ordering, the
+    default sheet/file names and the roles allowed to export it. The model's
+    table version decides when cached exports go stale.
+    """
+
+    def __init__(
+        self, name, model, sheet_name, filename, columns, order_by, roles, joins=()
+    ):
+        self.name = name
+        self.model = model
+        self.roles = roles
+        self.sheet_name = sheet_name
+        self.filename = filename
+        self.columns = columns
+        self.order_by = order_by
+        self.joins = joins
+
+    @property
+    def headers(self):
+        return [column.header for column in self.columns]
+
+    def statement(self, where=None):
+        statement = select(*(column.column for column in self.columns))
+        for target, onclause in self.joins:
+            statement = statement.join(target, onclause)
+        if where is not None:
+            statement = statement.where(where)
+        return statement.order_by(*self.order_by)
+
+
+def _columns(model, names, formatter=None):
+    return [ExportColumn(name, getattr(model, name), formatter) for name in names]
+
+
+EXPORTS = {
+    "requirements": ExportSpec(
+        "requirements",
+        Requirement,
+        "Requirements",
+        "requirements.xlsx",
+        # Same values as Requirement.to_dict(): dates as ISO 8601 strings
+        _columns(Requirement, Requirement.SERIALIZED_FIELDS, iso_dates),
+        order_by=[Requirement.requirement_id],
+        roles=["Admin", "Super-Admin"],
+    ),
+    "joining": ExportSpec(
+        "joining",
+        Joining,
+        "Joinings",
+        "joinings.xlsx",
+        _columns(Joining, Joining.SERIALIZED_FIELDS),
+        order_by=[Joining.employee_id],
+        roles=["HR", "Super-Admin"],
+    ),
+    "it_assets": ExportSpec(
+        "it_assets",
+        ITAssets,
+        "IT Assets",
+        "it_assets.xlsx",
+        _columns(ITAssets, ITAssets.SERIALIZED_FIELDS),
+        order_by=[ITAssets.asset_id],
+        roles=["IT-Admin", "Super-Admin"],
+    ),
+    # One row per license attribute
+    "licenses": ExportSpec(
+        "licenses",
+        SoftwareLicense,
+        "Licenses",
+        "licenses.xlsx",
+        _columns(
+            SoftwareLicense,
+            ("license_id", "employee_id", "created_date", "last_modified_date"),
+        )
+        + _columns(LicenseAttribute, ("attribute_name", "attribute_value")),
+        order_by=[SoftwareLicense.license_id, LicenseAttribute.attribute_id],
+        roles=["IT-Admin", "Super-Admin"],
+        joins=[
+            (LicenseAttribute, LicenseAttribute.license_id == SoftwareLicense.license_id)
+        ],
+    ),
+}
+
+
+def iter_frames(spec, statement):
+    """
+    Streams the rows of a statement as DataFrames of EXPORT_BATCH_SIZE rows,
+    read column-wise with pd.read_sql from a server-side cursor. Columns are
+    named after the spec headers and the spec formatters are applied to whole
+    columns at once.
+    """
+    import pandas as pd
+
+    batch_size = current_app.config.get("EXPORT_BATCH_SIZE", 1000)
+    formatters = [
+        (column.header, column.formatter) for column in spec.columns if column.formatter
+    ]
+
+    text_dates = []
+    if db.session.get_bind().dialect.name == "sqlite":
+        # SQLite stores datetimes as ISO text; read it raw and parse whole
+        # columns at once rather than converting every value in Python
+        text_dates = [
+            column.header
+            for column in spec.columns
+            if isinstance(column.column.type, DateTime)
+        ]
+        statement = statement.with_only_columns(
+            *(
+                type_coerce(column.column, String)
+                if column.header in text_dates
+                else column.column
+                for column in spec.columns
+            ),
+            maintain_column_froms=True,
+        )
+
+    frames = pd.read_sql(
+        statement.execution_options(yield_per=batch_size),
+        db.session.connection(),
+        chunksize=batch_size,
+        dtype_backend="numpy_nullable",
+    )
+    for frame in frames:
+        if frame.empty:
+            continue
+        frame.columns = spec.headers
+        for header in text_dates:
+            frame[header] = pd.to_datetime(frame[header], format="ISO8601")
+        for header, formatter in formatters:
+            frame[header] = formatter(frame[header])
+        yield frame
+
+
+def frame_rows(frames):
+    """
+    Yields plain row tuples from DataFrames, with NULLs as None.
+    """
+    for frame in frames:
+        values = frame.astype(object)
+        yield from values.where(values.notna(), None).itertuples(index=False, name=None)
+
+
+def write_xlsx(sheets, fileobj):
+    """
+    Writes (title, headers, rows) sheets with openpyxl's write-only mode, which
+    flushes rows to disk as they are appended instead of keeping cells in memory.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    for title, headers, rows in sheets:
+        worksheet = workbook.create_sheet(title=title)
+        worksheet.append(headers)
+        for row in rows:
+            worksheet.append(row)
+    workbook.save(fileobj)
+
+
+def _peek(items):
+    """
+    Returns (is_empty, items) without losing the first item of the iterator.
+    """
+    items = iter(items)
+    for first in items:
+
+        def chained():
+            yield first
+            yield from items
+
+        return False, chained()
+    return True, iter(())
+
+
+def _iso_frame(frame):
+    # Datetimes are written as ISO 8601 strings
+    columns = frame.select_dtypes("datetime").columns
+    if len(columns):
+        frame = frame.copy()
+        for name in columns:
+            frame[name] = iso_dates(frame[name])
+    return frame
+
+
+def iter_csv(headers, frames):
+    """
+    Yields CSV text one frame at a time, starting with the header line.
+    Datetimes are written as ISO 8601 strings and NULLs as empty fields.
+    """
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(headers)
+    yield buffer.getvalue()
+
+    # csv.writer ends lines with \r\n; to_csv defaults to \n
+    for frame in frames:
+        yield _iso_frame(frame).to_csv(header=False, index=False, lineterminator="\r\n")
+
+
+def iter_ndjson(headers, frames):
+    """
+    Yields newline-delimited JSON, one object per row, one frame at a time.
+    """
+    for frame in frames:
+        # to_json escapes "/" as "\/"; a backslash in the data is escaped as
+        # "\\", so every "\/" left in the output is one of those
+        lines = _iso_frame(frame).to_json(orient="records", lines=True).replace("\\/", "/")
+        yield lines if lines.endswith("\n") else lines + "\n"
+
+
+def _gzip(chunks):
+    """
+    Compresses a stream of text chunks on the fly.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+# Streamed formats: (row serializer, mimetype, file extension)
+STREAM_FORMATS = {
+    "csv": (iter_csv, "text/csv", "csv"),
+    "ndjson": (iter_ndjson, "application/x-ndjson", "ndjson"),
+}
+
+EXPORT_FORMATS = ("xlsx",) + tuple(STREAM_FORMATS)
+
+
+def parse_format():
+    """
+    Returns the export format requested with ?format= (xlsx by default).
+    """
+    export_format = request.args.get("format", "xlsx")
+    if export_format not in EXPORT_FORMATS:
+        raise QueryParameterError(
+            f"Unsupported format '{export_format}'; expected one of {', '.join(EXPORT_FORMATS)}"
+        )
+    return export_format
+
+
+def export_filename(filename, export_format):
+    """
+    Returns the download name of an export in the given format.
+    """
+    extension = STREAM_FORMATS[export_format][2] if export_format in STREAM_FORMATS else "xlsx"
+    return filename.rsplit(".", 1)[0] + "." + extension
+
+
+def export_mimetype(export_format):
+    if export_format in STREAM_FORMATS:
+        return STREAM_FORMATS[export_format][1]
+    return XLSX_MIMETYPE
+
+
+def write_export(export_format, headers, frames, fileobj, sheet_name="Sheet"):
+    """
+    Writes frames to a binary file object in the given export format.
+    """
+    if export_format in STREAM_FORMATS:
+        serializer = STREAM_FORMATS[export_format][0]
+        for chunk in serializer(headers, frames):
+            fileobj.write(chunk.encode("utf-8"))
+    else:
+        write_xlsx([(sheet_name, headers, frame_rows(frames))], fileobj)
+
+
+def stream_export(
+    export_format, headers, frames, download_name, compress=False, cache_key=None
+):
+    """
+    Sends frames as a chunked CSV or NDJSON response while they are read from
+    the database cursor, gzip-compressed when requested. With a cache_key the
+    bytes sent are also written to the export cache.
+    """
+    serializer = STREAM_FORMATS[export_format][0]
+    chunks = serializer(headers, frames)
+    if compress:
+        chunks = _gzip(chunks)
+    else:
+        chunks = (chunk.encode("utf-8") for chunk in chunks)
+    if cache_key:
+        chunks = export_cache.tee(cache_key, chunks)
+
+    # Keep the request (and its database session) alive while streaming
+    response = Response(
+        stream_with_context(chunks), mimetype=export_mimetype(export_format)
+    )
+    response.headers["Content-Disposition"] = f"attachment; filename={download_name}"
+    return _content_encoding(response, export_format, compress)
+
+
+def _content_encoding(response, export_format, compress):
+    if export_format in STREAM_FORMATS:
+        response.vary.add("Accept-Encoding")
+    if compress:
+        response.headers["Content-Encoding"] = "gzip"
+    return response
+
+
+def export_response(
+    spec,
+    where=None,
+    filterable=None,
+    sheet_name=None,
+    download_name=None,
+    not_found=None,
+):
+    """
+    Exports a spec in the format requested with ?format=. Excel workbooks are
+    built into a spooled temporary file and sent once complete; CSV and NDJSON
+    are streamed row by row. Peak memory stays flat regardless of the number
+    of rows. When not_found is given, an empty result returns a 404 with that
+    message.
+
+    Full-table exports are kept in the export cache, keyed by the filters,
+    format and the table version, and served from disk while the table is
+    unchanged.
+    """
+    export_format = parse_format()
+    sheet_name = sheet_name or spec.sheet_name
+    download_name = export_filename(download_name or spec.filename, export_format)
+    compress = export_format in STREAM_FORMATS and "gzip" in request.accept_encodings
+    statement = spec.statement(where)
+    filters = request.args.getlist("filter") if filterable else []
+    if filters:
+        statement = apply_filters(statement, filterable, filters)
+
+    cache_key = None
+    if where is None and export_cache.enabled:
+        cache_key = export_cache.key(
+            spec.name,
+            export_format,
+            sheet_name,
+            sorted(filters),
+            "gzip" if compress else "identity",
+            table_version(spec.model),
+        )
+        cached = export_cache.get(cache_key)
+        if cached:
+            response = send_file(
+                cached,
+                as_attachment=True,
+                download_name=download_name,
+                mimetype=export_mimetype(export_format),
+            )
+            return _content_encoding(response, export_format, compress)
+
+    empty, frames = _peek(iter_frames(spec, statement))
+    if empty and not_found:
+        return jsonify({"message": not_found}), 404
+
+    if export_format in STREAM_FORMATS:
+        return stream_export(
+            export_format, spec.headers, frames, download_name, compress, cache_key
+        )
+
+    if cache_key:
+        with export_cache.writer(cache_key) as fileobj:
+            write_export(export_format, spec.headers, frames, fileobj, sheet_name)
+        return send_file(
+            export_cache.path(cache_key),
+            as_attachment=True,
+            download_name=download_name,
+            mimetype=XLSX_MIMETYPE,
+        )
+
+    return send_workbook(
+        [(sheet_name, spec.headers, frame_rows(frames))], download_name
+    )
+
+
+def send_workbook(sheets, download_name):
+    """
+    Writes (title, headers, rows) sheets into a spooled temporary file, which
+    spills to disk past EXPORT_SPOOL_MAX_SIZE, and sends it.
+    """
+    spooled = tempfile.SpooledTemporaryFile(
+        max_size=current_app.config.get("EXPORT_SPOOL_MAX_SIZE", 8 * 1024 * 1024)
+    )
+    write_xlsx(sheets, spooled)
+    spooled.seek(0)
+
+    return send_file(
+        spooled,
+        as_attachment=True,
+        download_name=download_name,
+        mimetype=XLSX_MIMETYPE,
+    )
+
+
+def prepare_sheets(selections):
+    """
+    Reads and formats one sheet per (spec, ids) selection, each with a single
+    primary key IN query. Sheets are prepared concurrently, each thread with
+    its own app context and database session. Returns (title, headers, rows)
+    sheets in the order given.
+    """
+    app = current_app._get_current_object()
+
+    def prepare(spec, ids):
+        with app.app_context():
+            primary_key = inspect(spec.model).primary_key[0]
+            statement = spec.statement(primary_key.in_(ids))
+            return list(frame_rows(iter_frames(spec, statement)))
+
+    workers = min(len(selections), app.config.get("EXPORT_BATCH_WORKERS", 4)) or 1
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(prepare, spec, ids) for spec, ids in selections]
+        return [
+            (spec.sheet_name, spec.headers, future.result())
+            for (spec, _), future in zip(selections, futures)
+        ]
@@ -0,0 +1,143 @@
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeout
+from concurrent.futures.process import BrokenProcessPool
+from werkzeug.security import generate_password_hash, check_password_hash
+from requirements.workers import PerProcess
+
+
+class HashingBusy(Exception):
+    """
+    Raised when the hashing pool already has as much work as it is allowed to queue.
+    """
+
+    def __init__(self, retry_after):
+        super().__init__("Password hashing pool is saturated")
+        self.retry_after = retry_after
+
+
+def default_workers():
+    """
+    Pool processes per web worker: every gunicorn worker starts its own pool,
+    so the cores are split between them.
+    """
+    return max(1, (os.cpu_count() or 1) // int(os.getenv("WEB_CONCURRENCY", 2)))
+
+
+class HashingExecutor:
+    """
+    Runs password hashing on a process pool so the slow PBKDF2/scrypt work uses
+    real cores instead of blocking the request worker. The number of in-flight
+    jobs is bounded; once the bound is reached callers get HashingBusy at once
+    instead of queueing behind other logins. A job that times out or loses its
+    pool process also ends in HashingBusy, so callers answer 503 either way.
+
+    Pool processes are started from a forkserver (spawn where that is not
+    available) rather than forked from the request worker, so they do not
+    inherit its threads, locks or open connections. As with any spawned
+    process they import __main__, so a script that hashes through the pool
+    needs an `if __name__ == "__main__":` guard.
+    """
+
+    def __init__(self, workers=None, queue_size=32, timeout=10, retry_after=1):
+        self.workers = workers if workers is not None else default_workers()
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._pool = PerProcess(self._start_pool)
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_size)
+
+    def configure(self, app):
+        self.workers = app.config.get("HASH_POOL_WORKERS", self.workers)
+        self.queue_size = app.config.get("HASH_QUEUE_SIZE", self.queue_size)
+        self.timeout = app.config.get("HASH_TIMEOUT", self.timeout)
+        self.retry_after = app.config.get("HASH_RETRY_AFTER", self.retry_after)
+        self._slots = threading.BoundedSemaphore(max(self.workers, 1) + self.queue_size)
+        self._reset_pool()
+
+    def check_password(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    def hash_password(self, password):
+        return self._run(generate_password_hash, password)
+
+    def hash_passwords(self, passwords):
+        """
+        Hashes many passwords in parallel across the pool, keeping at most one
+        job per pool process in flight. Each job takes a queue slot like a
+        login does (waiting for one rather than failing), so logins that
+        arrive meanwhile queue behind a few hashes instead of the whole batch.
+        """
+        passwords = list(passwords)
+        if not self.workers:
+            return [generate_password_hash(password) for password in passwords]
+
+        hashes = []
+        in_flight = deque()
+        try:
+            for password in passwords:
+                if len(in_flight) >= self.workers:
+                    hashes.append(self._result(in_flight.popleft()))
+                in_flight.append(self._start(generate_password_hash, password, wait=self.timeout))
+            while in_flight:
+                hashes.append(self._result(in_flight.popleft()))
+        finally:
+            for future in in_flight:
+                future.cancel()
+        return hashes
+
+    def _run(self, fn, *args):
+        # With no pool workers configured, hash inline (useful for scripts and tests)
+        if not self.workers:
+            return fn(*args)
+        return self._result(self._start(fn, *args))
+
+    def _start(self, fn, *args, wait=None):
+        # Takes a queue slot, waiting up to wait seconds for one (or not at
+        # all), and submits the job. The slot is released on the semaphore it
+        # came from, even if configure() replaced it since.
+        slots = self._slots
+        if not (slots.acquire(timeout=wait) if wait else slots.acquire(blocking=False)):
+            raise HashingBusy(self.retry_after)
+        try:
+            future = self._submit(fn, *args)
+        except BaseException as e:
+            slots.release()
+            if isinstance(e, BrokenProcessPool):
+                raise HashingBusy(self.retry_after) from e
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        return future
+
+    def _result(self, future):
+        try:
+            return future.result(timeout=self.timeout)
+        except FuturesTimeout as e:
+            # Drop the job if it has not started; the caller is told to retry
+            future.cancel()
+            raise HashingBusy(self.retry_after) from e
+        except BrokenProcessPool as e:
+            # A pool process died; start a fresh pool for the next caller
+            self._reset_pool()
+            raise HashingBusy(self.retry_after) from e
+
+    def _submit(self, fn, *args):
+        try:
+            return self._pool.get().submit(fn, *args)
+        except BrokenProcessPool:
+            self._reset_pool()
+            return self._pool.get().submit(fn, *args)
+
+    def _start_pool(self):
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        return ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context(method)
+        )
+
+    def _reset_pool(self):
+        self._pool.reset(lambda pool: pool.shutdown(wait=False, cancel_futures=True))
+
+
+hashing = HashingExecutor()
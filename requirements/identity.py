@@ -0,0 +1,184 @@
+import logging
+import sqlite3
+from collections import namedtuple
+from flask_jwt_extended.exceptions import RevokedTokenError
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from requirements.__init__ import db, jwt
+from requirements.shared_state import SharedState
+from requirements.ttl_cache import TTLCache
+from models import User, Role
+
+logger = logging.getLogger(__name__)
+
+# Lightweight, immutable view of a user that is safe to share between requests.
+# access_revoked_before is the user's access-token cutoff (see revoke_access_tokens).
+Identity = namedtuple(
+    "Identity", ["id", "email", "role_name", "role_version", "access_revoked_before"]
+)
+
+# Per-worker cache of user id -> (generation, Identity)
+identity_cache = TTLCache()
+
+# Per-user state shared by every worker on the host. Committing a change to a
+# user bumps its generation, and a cached identity stamped with an older
+# generation is re-read, so the change reaches all workers at once. The same
+# row holds the user's access-token cutoff, so checking it costs nothing
+# beyond the generation read every authenticated request already does.
+identity_state = SharedState(
+    "identity.db",
+    """
+    CREATE TABLE IF NOT EXISTS identity_state (
+        user_id INTEGER PRIMARY KEY,
+        generation INTEGER NOT NULL DEFAULT 0,
+        access_revoked_before REAL NOT NULL DEFAULT 0
+    );
+    """,
+)
+
+
+def init_identity_cache(app):
+    """
+    Sizes the identity cache from the app configuration.
+    """
+    identity_cache.configure(
+        maxsize=app.config.get("IDENTITY_CACHE_SIZE", 1024),
+        ttl=app.config.get("IDENTITY_CACHE_TTL", 300),
+    )
+    identity_state.configure(app)
+
+
+def _shared_state(user_id):
+    # (generation, access_revoked_before), or (None, None) when the shared
+    # state cannot be read; the cache is bypassed then
+    try:
+        row = identity_state.connection().execute(
+            "SELECT generation, access_revoked_before FROM identity_state WHERE user_id = ?",
+            (int(user_id),),
+        ).fetchone()
+    except sqlite3.Error:
+        logger.exception("Identity state read failed")
+        return None, None
+    return tuple(row) if row else (0, 0)
+
+
+def load_identity(user_id, fresh=False):
+    """
+    Returns the Identity for a user id, reading the user and role in a single
+    query on a cache miss. Returns None if the user does not exist. fresh=True
+    always reads the database (the result still refreshes the cache).
+    access_revoked_before is None if the shared state could not be read.
+    """
+    key = str(user_id)
+    generation, access_revoked_before = _shared_state(user_id)
+    if generation is not None and not fresh:
+        cached = identity_cache.get(key)
+        if cached is not None and cached[0] == generation:
+            return cached[1]
+
+    row = (
+        db.session.query(User.id, User.email, Role.role_name, User.role_version)
+        .outerjoin(Role, User.role_id == Role.role_id)
+        .filter(User.id == int(user_id))
+        .first()
+    )
+    if row is None:
+        return None
+
+    identity = Identity(
+        id=row.id,
+        email=row.email,
+        role_name=row.role_name,
+        role_version=row.role_version,
+        access_revoked_before=access_revoked_before,
+    )
+    if generation is not None:
+        identity_cache.set(key, (generation, identity))
+    return identity
+
+
+def remember_identity(user):
+    """
+    Primes the cache from a User instance that is already loaded (e.g. at login).
+    """
+    generation, access_revoked_before = _shared_state(user.id)
+    identity = Identity(
+        id=user.id,
+        email=user.email,
+        role_name=user.role.role_name if user.role else None,
+        role_version=user.role_version,
+        access_revoked_before=access_revoked_before,
+    )
+    if generation is not None:
+        identity_cache.set(str(user.id), (generation, identity))
+    return identity
+
+
+def invalidate_identity(user_id):
+    """
+    Drops a user's cached identity in every worker.
+    """
+    identity_cache.pop(str(user_id))
+    try:
+        identity_state.connection().execute(
+            "INSERT INTO identity_state (user_id, generation) VALUES (?, 1) "
+            "ON CONFLICT(user_id) DO UPDATE SET generation = generation + 1",
+            (int(user_id),),
+        )
+    except sqlite3.Error:
+        logger.exception("Identity invalidation failed for user %s", user_id)
+
+
+def revoke_access_tokens(user_id, issued_before):
+    """
+    Revokes, in every worker, the user's access tokens issued at or before
+    issued_before (a JWT iat). Returns False if the shared state could not be
+    written.
+    """
+    identity_cache.pop(str(user_id))
+    try:
+        identity_state.connection().execute(
+            "INSERT INTO identity_state (user_id, generation, access_revoked_before) "
+            "VALUES (?, 1, ?) ON CONFLICT(user_id) DO UPDATE SET "
+            "generation = generation + 1, "
+            "access_revoked_before = max(access_revoked_before, excluded.access_revoked_before)",
+            (int(user_id), issued_before),
+        )
+    except sqlite3.Error:
+        logger.exception("Access token revocation failed for user %s", user_id)
+        return False
+    return True
+
+
+@jwt.user_lookup_loader
+def _user_lookup_callback(jwt_header, jwt_data):
+    # flask_jwt_extended stores the result on the request context, so
+    # current_user is resolved at most once per request
+    from requirements.tokens import access_token_revoked
+
+    identity = load_identity(jwt_data["sub"])
+    if identity is not None and jwt_data["type"] == "access":
+        if access_token_revoked(identity, jwt_data):
+            raise RevokedTokenError(jwt_header, jwt_data)
+    return identity
+
+
+# Write-through invalidation: remember which users were written during a flush
+# and invalidate them in every worker once the transaction has committed.
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session, flush_context):
+    changed = session.info.setdefault("changed_user_ids", set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User) and obj.id is not None:
+            changed.add(obj.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session):
+    for user_id in session.info.pop("changed_user_ids", ()):
+        invalidate_identity(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_users(session):
+    session.info.pop("changed_user_ids", None)
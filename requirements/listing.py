@@ -0,0 +1,258 @@
+import base64
+import binascii
+import json
+from collections import namedtuple
+from datetime import datetime
+from flask import request, current_app
+from sqlalchemy import and_, or_, false, inspect, Integer, DateTime, Date, Boolean
+from sqlalchemy.orm import load_only
+
+# One page of a list endpoint. next_cursor is None on the last page.
+Page = namedtuple("Page", ["items", "next_cursor", "paginated"])
+
+
+class QueryParameterError(ValueError):
+    """
+    Raised when a list endpoint receives an invalid query parameter.
+    Registered in create_app to produce a 400 response.
+    """
+
+
+def encode_cursor(sort_spec, values):
+    payload = {
+        "s": sort_spec,
+        "v": [{"$dt": v.isoformat()} if isinstance(v, datetime) else v for v in values],
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor, sort_spec):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        values = [
+            datetime.fromisoformat(v["$dt"]) if isinstance(v, dict) else v
+            for v in payload["v"]
+        ]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise QueryParameterError("Invalid cursor")
+    if payload.get("s") != sort_spec:
+        raise QueryParameterError("Cursor does not match the requested sort order")
+    return values
+
+
+# Operators accepted by ?filter=<column>:<op>:<value>
+FILTER_OPERATORS = ("eq", "in", "range", "prefix")
+MAX_IN_VALUES = 100
+
+
+def _coerce(column, raw):
+    """
+    Converts a query-string value to the Python type of the column.
+    """
+    column_type = column.property.columns[0].type
+    try:
+        if isinstance(column_type, Boolean):
+            if raw.lower() not in ("true", "false", "1", "0"):
+                raise ValueError(raw)
+            return raw.lower() in ("true", "1")
+        if isinstance(column_type, Integer):
+            return int(raw)
+        if isinstance(column_type, DateTime):
+            return datetime.fromisoformat(raw)
+        if isinstance(column_type, Date):
+            return datetime.fromisoformat(raw).date()
+    except ValueError:
+        raise QueryParameterError(f"Invalid value '{raw}' for '{column.key}'")
+    return raw
+
+
+def _filter_clause(column, op, value):
+    if op == "eq":
+        return column == _coerce(column, value)
+    if op == "in":
+        values = [v for v in value.split(",") if v != ""]
+        if not values or len(values) > MAX_IN_VALUES:
+            raise QueryParameterError(f"'in' takes 1 to {MAX_IN_VALUES} comma-separated values")
+        return column.in_([_coerce(column, v) for v in values])
+    if op == "range":
+        low, sep, high = value.partition(",")
+        if not sep or (not low and not high):
+            raise QueryParameterError("'range' takes 'low,high' (either bound may be empty)")
+        clauses = []
+        if low:
+            clauses.append(column >= _coerce(column, low))
+        if high:
+            clauses.append(column <= _coerce(column, high))
+        return and_(*clauses)
+    if op == "prefix":
+        escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return column.like(f"{escaped}%", escape="\\")
+    raise QueryParameterError(
+        f"Unknown filter operator '{op}' (use one of {', '.join(FILTER_OPERATORS)})"
+    )
+
+
+def list_endpoint(filterable):
+    """
+    Marks a view as a list endpoint filtered and sorted by the filterable
+    whitelist. Put it directly above the view function: the decorators
+    outside it copy the mark, so it is found on the registered view.
+    flask check-query-plans checks the query plans of every marked endpoint.
+    """
+
+    def decorator(fn):
+        fn.list_filters = filterable
+        return fn
+
+    return decorator
+
+
+def apply_filters(query, filterable, expressions=None):
+    """
+    Applies every ?filter=<column>:<op>:<value> parameter to the query as a SQL
+    WHERE clause. Only columns in the filterable whitelist are accepted.
+    Expressions can also be passed explicitly (e.g. from a stored export job).
+
+    Operators: eq (single value), in (comma-separated values), range
+    (inclusive 'low,high', either side optional) and prefix (starts with).
+    """
+    if expressions is None:
+        expressions = request.args.getlist("filter")
+    for expression in expressions:
+        name, _, rest = expression.partition(":")
+        op, sep, value = rest.partition(":")
+        if not sep:
+            raise QueryParameterError("filter must look like <column>:<op>:<value>")
+        if name not in filterable:
+            raise QueryParameterError(f"Cannot filter by '{name}'")
+        query = query.filter(_filter_clause(filterable[name], op, value))
+    return query
+
+
+def parse_fields(model):
+    """
+    Parses ?fields=a,b against the model's SERIALIZED_FIELDS. Returns None when
+    the parameter is absent (all fields). The primary key is always included.
+    """
+    spec = request.args.get("fields")
+    if spec is None:
+        return None
+
+    fields = []
+    for name in filter(None, (part.strip() for part in spec.split(","))):
+        if name not in model.SERIALIZED_FIELDS:
+            raise QueryParameterError(f"Unknown field '{name}'")
+        if name not in fields:
+            fields.append(name)
+
+    primary_key = inspect(model).primary_key[0].key
+    if primary_key not in fields:
+        fields.insert(0, primary_key)
+    return fields
+
+
+def project(query, model, fields, extra_columns=()):
+    """
+    Restricts the SELECT to the columns behind the requested fields (plus any
+    extra columns, e.g. sort keys), so other columns are never read or hydrated.
+    """
+    if fields is None:
+        return query
+    column_names = inspect(model).column_attrs.keys()
+    columns = [getattr(model, name) for name in fields if name in column_names]
+    columns += [column for column in extra_columns if column.key not in fields]
+    return query.options(load_only(*columns))
+
+
+def parse_sort(sortable, primary_key):
+    """
+    Parses ?sort=col,-col into [(name, column, descending)]. The primary key is
+    always appended as the final tie-breaker so the ordering is unique.
+    """
+    order = []
+    pk_descending = False
+    for item in filter(None, (part.strip() for part in request.args.get("sort", "").split(","))):
+        descending = item.startswith("-")
+        name = item.lstrip("-")
+        if name not in sortable:
+            raise QueryParameterError(f"Cannot sort by '{name}'")
+        if name == primary_key.key:
+            pk_descending = descending
+        elif name not in (n for n, _, _ in order):
+            order.append((name, sortable[name], descending))
+
+    order.append((primary_key.key, primary_key, pk_descending))
+    return order
+
+
+def _after(column, value, descending):
+    # SQLite sorts NULLs first in ascending order and last in descending order
+    if value is None:
+        return column.isnot(None) if not descending else false()
+    if descending:
+        return or_(column < value, column.is_(None))
+    return column > value
+
+
+def _equal(column, value):
+    return column.is_(None) if value is None else column == value
+
+
+def _keyset_condition(order, values):
+    """
+    Builds (c1 > v1) OR (c1 = v1 AND c2 > v2) OR ... honouring each column's direction.
+    """
+    clauses = []
+    for i, (_, column, descending) in enumerate(order):
+        equal_prefix = [_equal(order[j][1], values[j]) for j in range(i)]
+        clauses.append(and_(*equal_prefix, _after(column, values[i], descending)))
+    return or_(*clauses)
+
+
+def paginate(query, primary_key, sortable=None, fields=None):
+    """
+    Sorts a query from ?sort= and applies keyset pagination from ?limit= and
+    ?cursor=. Each page is fetched with a WHERE on the last row's sort key, so
+    deep pages cost the same as the first one. Without limit or cursor the
+    whole (sorted) result is returned, as before. When fields is given only
+    those columns (and the sort keys) are loaded.
+    """
+    sortable = dict(sortable or {})
+    sortable.setdefault(primary_key.key, primary_key)
+    model = primary_key.class_
+    if hasattr(model, "last_modified_date"):
+        sortable.setdefault("last_modified_date", model.last_modified_date)
+
+    order = parse_sort(sortable, primary_key)
+    query = project(query, model, fields, [column for _, column, _ in order])
+    query = query.order_by(
+        *(column.desc() if descending else column.asc() for _, column, descending in order)
+    )
+
+    cursor = request.args.get("cursor")
+    limit = request.args.get("limit")
+    if cursor is None and limit is None:
+        return Page(query.all(), None, False)
+
+    try:
+        limit = int(limit) if limit is not None else current_app.config.get("PAGINATION_DEFAULT_LIMIT", 50)
+    except ValueError:
+        raise QueryParameterError("limit must be an integer")
+    if limit < 1:
+        raise QueryParameterError("limit must be positive")
+    limit = min(limit, current_app.config.get("PAGINATION_MAX_LIMIT", 500))
+
+    sort_spec = ",".join(("-" if descending else "") + name for name, _, descending in order)
+    if cursor:
+        query = query.filter(_keyset_condition(order, decode_cursor(cursor, sort_spec)))
+
+    # Fetch one extra row to learn whether another page exists
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(sort_spec, [getattr(last, name) for name, _, _ in order])
+    return Page(rows, next_cursor, True)
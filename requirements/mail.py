@@ -0,0 +1,214 @@
+import os
+import smtplib
+import ssl
+import threading
+import time
+from collections import deque
+from email.message import EmailMessage
+
+# The message was refused but the session is still usable for the next one
+_MESSAGE_ERRORS = (
+    smtplib.SMTPRecipientsRefused,
+    smtplib.SMTPSenderRefused,
+    smtplib.SMTPDataError,
+)
+
+
+def is_permanent(error):
+    """
+    True for a 5xx rejection, which retrying the same message will not fix.
+    """
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code >= 500
+
+
+class _Session:
+    def __init__(self, smtp):
+        self.smtp = smtp
+        self.last_used = time.monotonic()
+        self.messages = 0
+
+
+class MailTransport:
+    """
+    Sends email over a small pool of authenticated SMTP sessions, so a batch
+    of messages pays for the connect, STARTTLS and login once instead of once
+    per message. A session that sat idle is checked with NOOP before it is
+    reused and replaced if the server dropped it; a session is also retired
+    after max_messages, the limit most servers enforce per connection. At most
+    size sessions are open at once per process.
+    """
+
+    def __init__(self, size=2, timeout=30, noop_after=5, max_idle=240, max_messages=100):
+        self.size = size
+        self.timeout = timeout
+        self.noop_after = noop_after
+        self.max_idle = max_idle
+        self.max_messages = max_messages
+        self.host = "localhost"
+        self.port = 25
+        self.use_tls = False
+        self.use_ssl = False
+        self.username = None
+        self.password = None
+        self.sender = None
+        self._lock = threading.Lock()
+        self._idle = deque()
+        self._slots = threading.BoundedSemaphore(size)
+        self._pid = os.getpid()
+
+    def configure(self, app):
+        self.host = app.config.get("MAIL_SERVER", self.host)
+        self.port = app.config.get("MAIL_PORT", self.port)
+        self.use_tls = app.config.get("MAIL_USE_TLS", self.use_tls)
+        self.use_ssl = app.config.get("MAIL_USE_SSL", self.use_ssl)
+        self.username = app.config.get("MAIL_USERNAME")
+        self.password = app.config.get("MAIL_PASSWORD")
+        self.sender = app.config.get("MAIL_DEFAULT_SENDER") or self.username
+        self.size = app.config.get("MAIL_POOL_SIZE", self.size)
+        self.timeout = app.config.get("MAIL_TIMEOUT", self.timeout)
+        self.max_idle = app.config.get("MAIL_POOL_MAX_IDLE", self.max_idle)
+        self.max_messages = app.config.get("MAIL_MAX_MESSAGES_PER_CONNECTION", self.max_messages)
+        self._slots = threading.BoundedSemaphore(self.size)
+
+    def message(self, to_email, subject, body, html_body=None):
+        """
+        Builds a message from the default sender: plain text, with html_body
+        as an HTML alternative if given. to_email may hold several
+        comma-separated addresses; they are delivered in one SMTP transaction.
+        """
+        if not self.sender:
+            raise ValueError("No sender configured: set MAIL_DEFAULT_SENDER or MAIL_USERNAME")
+        message = EmailMessage()
+        message["From"] = self.sender
+        message["To"] = to_email
+        message["Subject"] = subject
+        message.set_content(body)
+        if html_body:
+            message.add_alternative(html_body, subtype="html")
+        return message
+
+    def send(self, message):
+        error = self.send_many([message])[0]
+        if error is not None:
+            raise error
+
+    def send_many(self, messages):
+        """
+        Sends messages over one pooled session, reconnecting if the server
+        drops it. Returns one entry per message: None if the server accepted
+        it, otherwise the exception that failed it.
+        """
+        results = []
+        session = None
+        try:
+            for message in messages:
+                if session is None:
+                    try:
+                        session = self._acquire()
+                    except (smtplib.SMTPException, OSError) as e:
+                        # The server is unreachable; fail the rest instead of
+                        # reconnecting once per message
+                        results.extend([e] * (len(messages) - len(results)))
+                        break
+                try:
+                    session.smtp.send_message(message)
+                except _MESSAGE_ERRORS as e:
+                    results.append(e)
+                except (smtplib.SMTPException, OSError) as e:
+                    results.append(e)
+                    self._release(session, reusable=False)
+                    session = None
+                else:
+                    results.append(None)
+                    session.messages += 1
+                    if session.messages >= self.max_messages:
+                        self._release(session, reusable=False)
+                        session = None
+        finally:
+            if session is not None:
+                self._release(session, reusable=True)
+        return results
+
+    def close(self):
+        """
+        Ends every idle session.
+        """
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for session in idle:
+            self._quit(session)
+
+    def _acquire(self):
+        self._check_pid()
+        self._slots.acquire()
+        try:
+            while True:
+                with self._lock:
+                    session = self._idle.pop() if self._idle else None
+                if session is None:
+                    return self._connect()
+                if self._alive(session):
+                    return session
+                self._quit(session)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _release(self, session, reusable):
+        try:
+            if reusable:
+                session.last_used = time.monotonic()
+                with self._lock:
+                    self._idle.append(session)
+            else:
+                self._quit(session)
+        finally:
+            self._slots.release()
+
+    def _alive(self, session):
+        idle = time.monotonic() - session.last_used
+        if idle > self.max_idle:
+            return False  # Past the server's idle timeout; do not bother asking
+        if idle < self.noop_after:
+            return True
+        try:
+            return session.smtp.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def _connect(self):
+        if self.use_ssl:
+            smtp = smtplib.SMTP_SSL(
+                self.host, self.port, timeout=self.timeout, context=ssl.create_default_context()
+            )
+        else:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                smtp.starttls(context=ssl.create_default_context())
+            if self.username:
+                smtp.login(self.username, self.password)
+        except BaseException:
+            smtp.close()
+            raise
+        return _Session(smtp)
+
+    def _quit(self, session):
+        try:
+            session.smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            session.smtp.close()
+
+    def _check_pid(self):
+        # Sessions opened before a fork belong to the parent; start afresh
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._idle = deque()
+                    self._slots = threading.BoundedSemaphore(self.size)
+                    self._pid = os.getpid()
+
+
+mail_transport = MailTransport()
@@ -0,0 +1,121 @@
+import os
+import threading
+from datetime import timedelta
+import click
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
+
+# Labels and Requirement attributes listed in requirement notifications
+REQUIREMENT_DETAILS = (
+    ("Business Unit", "business_unit"),
+    ("Resource Requirement", "resource_requirement"),
+    ("Job Description", "job_description"),
+    ("Resource Type", "resource_type"),
+    ("Business Title", "business_title"),
+    ("Vector Title", "vector_title"),
+    ("Comments", "comments"),
+    ("Department", "department"),
+    ("Created Date", "created_date"),
+    ("Last Modified Date", "last_modified_date"),
+)
+
+
+def requirement_context(requirement):
+    return {
+        "requirement_id": requirement.requirement_id,
+        "details": [(label, getattr(requirement, name)) for label, name in REQUIREMENT_DETAILS],
+    }
+
+
+class NotificationRenderer:
+    """
+    Renders notification emails from the Jinja templates in the templates
+    folder: <name>.txt is the plain-text body and <name>.html (autoescaped)
+    its HTML alternative. The environment is built once per process and
+    templates are compiled once and kept in memory; compiled bytecode is
+    also cached on disk so a freshly started worker does not parse them
+    again (unless cache_folder is None). Templates are not reloaded when the
+    files change.
+    """
+
+    def __init__(self):
+        self.folder = None
+        self.cache_folder = None
+        self._environment = None
+        self._lock = threading.Lock()
+
+    def configure(self, app):
+        # The app is created from this package; templates/ is in the project root
+        self.folder = app.config.get("NOTIFICATION_TEMPLATE_FOLDER") or os.path.join(
+            os.path.dirname(app.root_path), "templates"
+        )
+        self.cache_folder = app.config.get("NOTIFICATION_TEMPLATE_CACHE") or os.path.join(
+            app.instance_path, "template_cache"
+        )
+
+    @property
+    def environment(self):
+        if self._environment is None:
+            with self._lock:
+                if self._environment is None:
+                    bytecode_cache = None
+                    if self.cache_folder is not None:
+                        os.makedirs(self.cache_folder, exist_ok=True)
+                        bytecode_cache = FileSystemBytecodeCache(self.cache_folder)
+                    self._environment = Environment(
+                        loader=FileSystemLoader(self.folder),
+                        autoescape=select_autoescape(["html"]),
+                        bytecode_cache=bytecode_cache,
+                        auto_reload=False,
+                        trim_blocks=True,
+                        lstrip_blocks=True,
+                    )
+        return self._environment
+
+    def load(self, name):
+        """
+        Returns the compiled (text, html) templates of a notification.
+        """
+        return (
+            self.environment.get_template(f"{name}.txt"),
+            self.environment.get_template(f"{name}.html"),
+        )
+
+    def render(self, name, **context):
+        """
+        Renders one notification. Returns (text, html).
+        """
+        text, html = self.load(name)
+        return text.render(context), html.render(context)
+
+
+notifications = NotificationRenderer()
+
+
+@click.command("send-requirement-digest")
+@click.option("--to", "to_email", required=True, help="Recipient of the digest.")
+@click.option("--hours", default=24, show_default=True, help="Include requirements created in this window.")
+def send_requirement_digest_command(to_email, hours):
+    """Queue one email listing the requirements created recently."""
+    from requirements.__init__ import db
+    from requirements.outbox import enqueue_email
+    from models import Requirement, get_current_utc_time
+
+    since = get_current_utc_time() - timedelta(hours=hours)
+    requirements = (
+        Requirement.query.filter(Requirement.created_date >= since)
+        .order_by(Requirement.requirement_id)
+        .all()
+    )
+    if not requirements:
+        click.echo("No new requirements.")
+        return
+
+    # One render pass over every requirement
+    body, html_body = notifications.render(
+        "email_digest",
+        since=since.strftime("%Y-%m-%d %H:%M UTC"),
+        requirements=[requirement_context(requirement) for requirement in requirements],
+    )
+    enqueue_email(to_email, f"Requirement Digest: {len(requirements)} new", body, html_body)
+    db.session.commit()
+    click.echo(f"Queued a digest of {len(requirements)} requirements to {to_email}.")
@@ -0,0 +1,221 @@
+import threading
+from datetime import timedelta
+import click
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+from requirements.__init__ import db
+from models import EmailOutbox, get_current_utc_time
+from requirements.mail import mail_transport, is_permanent
+from requirements.workers import PerProcess, claim, requeue_stale
+
+PENDING = "pending"
+SENDING = "sending"
+SENT = "sent"
+FAILED = "failed"
+
+
+def enqueue_email(to_email, subject, body, html_body=None):
+    """
+    Adds a message to the outbox in the current transaction, so it is sent if
+    and only if the caller's commit succeeds. Does not commit.
+    """
+    message = EmailOutbox(
+        to_email=to_email, subject=subject, body=body, html_body=html_body, status=PENDING
+    )
+    db.session.add(message)
+    db.session.info["outbox_pending"] = True
+    return message
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_dispatcher(session):
+    if session.info.pop("outbox_pending", False):
+        email_dispatcher.wake()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop("outbox_pending", None)
+
+
+class EmailDispatcher:
+    """
+    Sends the messages in the email_outbox table from a background thread so
+    requests never wait on the mail server. The thread is woken when a commit
+    adds messages and otherwise polls every poll_interval seconds. A message
+    is claimed with a compare-and-set on its status, so every worker can run
+    a dispatcher; failed sends are retried with exponential backoff until
+    max_attempts. Delivery is at least once: a claim that goes stale (its
+    worker died mid-send) is released and the message sent again.
+    """
+
+    def __init__(
+        self,
+        poll_interval=30,
+        batch_size=50,
+        max_attempts=6,
+        backoff_base=30,
+        backoff_max=3600,
+        claim_timeout=300,
+    ):
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.claim_timeout = claim_timeout
+        self.enabled = True
+        self._app = None
+        self._thread = PerProcess(self._start_thread)
+        self._wakeup = None
+
+    def configure(self, app):
+        self.enabled = app.config.get("OUTBOX_DISPATCHER_ENABLED", self.enabled)
+        self.poll_interval = app.config.get("OUTBOX_POLL_INTERVAL", self.poll_interval)
+        self.batch_size = app.config.get("OUTBOX_BATCH_SIZE", self.batch_size)
+        self.max_attempts = app.config.get("OUTBOX_MAX_ATTEMPTS", self.max_attempts)
+        self.backoff_base = app.config.get("OUTBOX_BACKOFF_BASE", self.backoff_base)
+        self.backoff_max = app.config.get("OUTBOX_BACKOFF_MAX", self.backoff_max)
+        self.claim_timeout = app.config.get("OUTBOX_CLAIM_TIMEOUT", self.claim_timeout)
+        self._app = app
+        # Picks up messages left by a previous process on the first request
+        app.before_request(self.ensure_started)
+
+    def ensure_started(self):
+        if self.enabled:
+            self._thread.get()
+
+    def wake(self):
+        if not self.enabled:
+            return
+        self.ensure_started()
+        self._wakeup.set()
+
+    def backoff(self, attempts):
+        """
+        Seconds to wait before retrying a message that failed attempts times.
+        """
+        return min(self.backoff_base * 2 ** (attempts - 1), self.backoff_max)
+
+    def _start_thread(self):
+        self._wakeup = threading.Event()
+        self._wakeup.set()  # Drain whatever is already due straight away
+        thread = threading.Thread(target=self._loop, name="email-outbox", daemon=True)
+        thread.start()
+        return thread
+
+    def dispatch(self):
+        """
+        Sends every message that is due, in batches. Returns the number of
+        messages sent and the number that failed.
+        """
+        sent = failed = 0
+        while True:
+            self.release_stale()
+            due = db.session.scalars(
+                select(EmailOutbox.id)
+                .where(
+                    EmailOutbox.status == PENDING,
+                    EmailOutbox.next_attempt_at <= get_current_utc_time(),
+                )
+                .order_by(EmailOutbox.next_attempt_at)
+                .limit(self.batch_size)
+            ).all()
+            # Ids taken by another worker in the meantime are skipped
+            claimed = [message_id for message_id in due if self._claim(message_id)]
+            if claimed:
+                batch_sent, batch_failed = self._send(claimed)
+                sent += batch_sent
+                failed += batch_failed
+            if len(due) < self.batch_size:
+                return sent, failed
+
+    def release_stale(self):
+        """
+        Returns messages whose claim went stale to the queue, or fails them
+        once they ran out of attempts.
+        """
+        requeue_stale(
+            EmailOutbox,
+            SENDING,
+            PENDING,
+            FAILED,
+            self.claim_timeout,
+            self.max_attempts,
+            requeue_values={"next_attempt_at": get_current_utc_time()},
+            failed_values={"last_error": "Sending was interrupted"},
+        )
+
+    def _claim(self, message_id):
+        return claim(EmailOutbox, message_id, PENDING, SENDING)
+
+    def _send(self, message_ids):
+        # The whole batch goes out over one pooled SMTP session
+        messages = db.session.scalars(
+            select(EmailOutbox).where(EmailOutbox.id.in_(message_ids))
+        ).all()
+        errors = mail_transport.send_many(
+            [
+                mail_transport.message(m.to_email, m.subject, m.body, m.html_body)
+                for m in messages
+            ]
+        )
+
+        delivered = [m.id for m, error in zip(messages, errors) if error is None]
+        if delivered:
+            self._finish(delivered, status=SENT, sent_date=get_current_utc_time(), last_error=None)
+        for message, error in zip(messages, errors):
+            if error is not None:
+                self._retry(message, error)
+        return len(delivered), len(messages) - len(delivered)
+
+    def _retry(self, message, error):
+        if message.attempts >= self.max_attempts or is_permanent(error):
+            values = {"status": FAILED}
+            self._app.logger.error(
+                "Giving up on email %s to %s after %d attempts: %s",
+                message.id, message.to_email, message.attempts, error,
+            )
+        else:
+            delay = self.backoff(message.attempts)
+            values = {
+                "status": PENDING,
+                "next_attempt_at": get_current_utc_time() + timedelta(seconds=delay),
+            }
+            self._app.logger.warning(
+                "Email %s to %s failed (attempt %d), retrying in %ds: %s",
+                message.id, message.to_email, message.attempts, delay, error,
+            )
+        self._finish([message.id], last_error=str(error), **values)
+
+    def _finish(self, message_ids, **values):
+        db.session.execute(
+            update(EmailOutbox)
+            .execution_options(synchronize_session=False)
+            .where(EmailOutbox.id.in_(message_ids), EmailOutbox.status == SENDING)
+            .values(**values)
+        )
+        db.session.commit()
+
+    def _loop(self):
+        wakeup = self._wakeup
+        while True:
+            wakeup.wait(self.poll_interval)
+            wakeup.clear()
+            with self._app.app_context():
+                try:
+                    self.dispatch()
+                except Exception:
+                    self._app.logger.exception("Email outbox dispatch failed")
+                finally:
+                    db.session.remove()
+
+
+email_dispatcher = EmailDispatcher()
+
+
+@click.command("send-outbox")
+def send_outbox_command():
+    """Send the emails in the outbox that are due, then exit."""
+    sent, failed = email_dispatcher.dispatch()
+    click.echo(f"Sent {sent} emails, {failed} failed.")
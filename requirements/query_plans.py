@@ -0,0 +1,161 @@
+import re
+from datetime import date, datetime
+import click
+from flask import current_app
+from sqlalchemy import inspect, text
+from sqlalchemy.orm import joinedload
+from requirements.__init__ import db
+from models import (
+    SoftwareLicense,
+    LicenseAttribute,
+    InterviewStatus,
+    RequirementApproval,
+    ITAssets,
+)
+
+# "SCAN <table>" without an index means SQLite reads the whole table
+_FULL_SCAN = re.compile(r"\bSCAN (\w+)(?! USING (?:COVERING )?INDEX)")
+
+# A value of each column type to compare against in an EXPLAIN
+_SAMPLE_VALUES = {int: 1, str: "a", datetime: datetime(2024, 1, 1), date: date(2024, 1, 1)}
+
+
+def list_endpoints():
+    """
+    Returns (name, model, filterable) for every registered GET route whose
+    view is marked with requirements.listing.list_endpoint.
+    """
+    endpoints = []
+    for rule in current_app.url_map.iter_rules():
+        filterable = getattr(current_app.view_functions[rule.endpoint], "list_filters", None)
+        if filterable is not None and "GET" in rule.methods:
+            model = next(iter(filterable.values())).class_
+            endpoints.append((f"GET {rule.rule}", model, filterable))
+    return endpoints
+
+
+def _indexed(column):
+    # Whether SQLite can search the column: the primary key or the first
+    # column of an index
+    column = column.property.columns[0]
+    return column.primary_key or any(
+        index.columns.values()[0] is column for index in column.table.indexes
+    )
+
+
+def _list_endpoint_queries():
+    """
+    Queries of every list endpoint: the unfiltered listing, which may scan its
+    table, and an eq filter on each filterable column that has an index,
+    which must use it. Both are ordered by the primary key, like a page.
+    """
+    queries = []
+    for name, model, filterable in list_endpoints():
+        primary_key = inspect(model).primary_key[0]
+        listing = model.query.order_by(primary_key)
+        queries.append((name, listing, {model.__tablename__}))
+        for column_name, column in filterable.items():
+            if _indexed(column):
+                value = _SAMPLE_VALUES[column.type.python_type]
+                queries.append(
+                    (
+                        f"{name}?filter={column_name}:eq:",
+                        listing.filter(column == value),
+                        set(),
+                    )
+                )
+    return queries
+
+
+def _plan_queries():
+    """
+    Representative filtered queries issued by the endpoints, paired with the
+    tables each query is allowed to scan in full (e.g. an unfiltered listing).
+    The list endpoint queries are derived from the registered routes; the
+    others are listed here.
+    """
+    return _list_endpoint_queries() + [
+        (
+            "GET /licenses?employee_id=",
+            SoftwareLicense.query.filter_by(employee_id=1).options(
+                joinedload(SoftwareLicense.dynamic_attributes)
+            ),
+            set(),
+        ),
+        (
+            "DELETE /licenses/<id> attributes",
+            LicenseAttribute.query.filter_by(license_id=1),
+            set(),
+        ),
+        (
+            "interviews by requirement",
+            InterviewStatus.query.filter_by(requirement_id=1),
+            set(),
+        ),
+        (
+            "approvals by requirement",
+            RequirementApproval.query.filter_by(requirement_id=1),
+            set(),
+        ),
+        (
+            "IT assets by employee",
+            ITAssets.query.filter_by(employee_id=1).order_by(ITAssets.created_date),
+            set(),
+        ),
+        (
+            "licenses by employee",
+            SoftwareLicense.query.filter_by(employee_id=1).order_by(
+                SoftwareLicense.created_date
+            ),
+            set(),
+        ),
+    ]
+
+
+def explain(query):
+    """
+    Returns the EXPLAIN QUERY PLAN detail lines for an ORM query.
+    """
+    compiled = query.statement.compile(
+        dialect=db.engine.dialect, compile_kwargs={"literal_binds": True}
+    )
+    rows = db.session.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).fetchall()
+    return [row[-1] for row in rows]
+
+
+def find_full_scans():
+    """
+    Returns (name, table, plan) for every query that scans a table it should search.
+    """
+    problems = []
+    for name, query, allowed_scans in _plan_queries():
+        plan = explain(query)
+        for line in plan:
+            for table in _FULL_SCAN.findall(line):
+                if table not in allowed_scans:
+                    problems.append((name, table, plan))
+    return problems
+
+
+@click.command("check-query-plans")
+def check_query_plans_command():
+    """Fail if an indexed endpoint query falls back to a full table scan."""
+    if db.engine.dialect.name != "sqlite":
+        click.echo("Query plan checks only run against SQLite.")
+        return
+
+    # The list endpoint queries come from the list_endpoint marks; with none
+    # found the check would pass without looking at any of them
+    if not list_endpoints():
+        click.echo("No list endpoints found: mark them with list_endpoint.")
+        raise SystemExit(1)
+
+    problems = find_full_scans()
+    for name, table, plan in problems:
+        click.echo(f"FULL SCAN of {table} in {name}:")
+        for line in plan:
+            click.echo(f"    {line}")
+
+    if problems:
+        raise SystemExit(1)
+    click.echo("All query plans use indexes.")
@@ -0,0 +1,131 @@
+import logging
+import math
+import sqlite3
+import time
+from requirements.shared_state import SharedState
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS login_buckets (
+    key TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS login_counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+class LoginRateLimiter:
+    """
+    Token-bucket limiter for login attempts keyed by client IP and by email.
+    Bucket state lives in a shared SQLite file so all gunicorn workers on the
+    host enforce the same limits.
+    """
+
+    # Fully refilled buckets are pruned every this many checks
+    PRUNE_EVERY = 1000
+
+    def __init__(self):
+        self.store = SharedState("ratelimit.db", _SCHEMA)
+        self.enabled = True
+        self.limits = {"ip": (20, 20 / 60.0), "email": (5, 5 / 60.0)}
+        self._checks = 0
+
+    def configure(self, app):
+        self.store.configure(app)
+        self.enabled = app.config.get("LOGIN_RATE_LIMIT_ENABLED", True)
+        self.limits = {
+            "ip": (
+                app.config.get("LOGIN_RATE_LIMIT_IP_BURST", 20),
+                app.config.get("LOGIN_RATE_LIMIT_IP_PER_MINUTE", 20) / 60.0,
+            ),
+            "email": (
+                app.config.get("LOGIN_RATE_LIMIT_EMAIL_BURST", 5),
+                app.config.get("LOGIN_RATE_LIMIT_EMAIL_PER_MINUTE", 5) / 60.0,
+            ),
+        }
+
+    def check(self, ip, email):
+        """
+        Consumes one token from both the IP and the email bucket. Returns 0 if
+        the attempt is allowed, otherwise the number of seconds to wait.
+        Nothing is consumed when either bucket is empty.
+        """
+        if not self.enabled:
+            return 0
+
+        keys = {"ip": f"ip:{ip}", "email": f"email:{(email or '').strip().lower()}"}
+        now = time.time()
+        try:
+            conn = self.store.connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                retry_after, rejected, levels = 0, [], {}
+                for kind, key in keys.items():
+                    capacity, rate = self.limits[kind]
+                    row = conn.execute(
+                        "SELECT tokens, updated_at FROM login_buckets WHERE key = ?",
+                        (key,),
+                    ).fetchone()
+                    tokens = capacity
+                    if row:
+                        tokens = min(capacity, row[0] + (now - row[1]) * rate)
+                    levels[key] = tokens
+                    if tokens < 1:
+                        rejected.append(kind)
+                        retry_after = max(retry_after, (1 - tokens) / rate)
+
+                if rejected:
+                    for kind in rejected:
+                        self._increment(conn, f"rejected_{kind}")
+                else:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO login_buckets (key, tokens, updated_at) "
+                        "VALUES (?, ?, ?)",
+                        [(key, tokens - 1, now) for key, tokens in levels.items()],
+                    )
+                    self._increment(conn, "allowed")
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error:
+            # Fail open: a broken limiter must not lock everybody out
+            logger.exception("Login rate limiter unavailable")
+            return 0
+
+        self._maybe_prune(now)
+        return math.ceil(retry_after) if rejected else 0
+
+    def stats(self):
+        rows = self.store.connection().execute(
+            "SELECT name, value FROM login_counters"
+        ).fetchall()
+        return dict(rows)
+
+    def _increment(self, conn, name):
+        conn.execute(
+            "INSERT INTO login_counters (name, value) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + 1",
+            (name,),
+        )
+
+    def _maybe_prune(self, now):
+        self._checks += 1
+        if self._checks % self.PRUNE_EVERY:
+            return
+        # A bucket idle long enough to refill completely is equivalent to no row
+        horizon = max(capacity / rate for capacity, rate in self.limits.values())
+        try:
+            self.store.connection().execute(
+                "DELETE FROM login_buckets WHERE updated_at < ?", (now - horizon,)
+            )
+        except sqlite3.Error:
+            logger.exception("Failed to prune login rate limit buckets")
+
+
+login_limiter = LoginRateLimiter()
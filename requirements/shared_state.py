@@ -0,0 +1,40 @@
+import os
+import sqlite3
+import threading
+
+
+class SharedState:
+    """
+    A small SQLite database in WAL mode that every worker process on the host
+    opens, used for state that must be shared between gunicorn workers without
+    an external server. Connections are kept per thread and per process, so
+    they are never shared across a fork.
+    """
+
+    def __init__(self, filename, schema):
+        self.filename = filename
+        self.schema = schema
+        self.path = None
+        self.timeout = 1.0
+        self._local = threading.local()
+
+    def configure(self, app):
+        directory = app.config.get("SHARED_STATE_DIR") or app.instance_path
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, self.filename)
+        self.timeout = app.config.get("SHARED_STATE_TIMEOUT", self.timeout)
+        self._local = threading.local()
+
+    def connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        # isolation_level=None leaves transaction control to explicit BEGIN statements
+        conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(self.schema)
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
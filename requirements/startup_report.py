@@ -0,0 +1,85 @@
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+import click
+
+# Heavy modules that must only be imported when an export is served
+LAZY_MODULES = ("pandas", "numpy", "openpyxl")
+
+# Runs in a fresh interpreter: imports the WSGI module (which builds the app)
+# and reports how long that took and how much memory the process holds.
+_PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+__import__({module!r})
+seconds = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": seconds,
+    "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "modules": len(sys.modules),
+    "lazy_loaded": [name for name in {lazy!r} if name in sys.modules],
+}}))
+"""
+
+# -X importtime lines: "import time: <self us> | <cumulative us> | <indent><module>"
+_IMPORT_TIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)")
+
+
+def probe_startup(module, project_root):
+    """
+    Imports module in a new interpreter with -X importtime. Returns the probe
+    results plus the self import time (in microseconds) of every module.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE.format(module=module, lazy=LAZY_MODULES)],
+        cwd=project_root,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["import_times"] = [
+        (match.group(4), int(match.group(1)))
+        for match in map(_IMPORT_TIME.match, completed.stderr.splitlines())
+        if match
+    ]
+    return result
+
+
+def import_time_by_package(import_times):
+    """
+    Sums self import times per top-level package, largest first.
+    """
+    totals = defaultdict(int)
+    for name, self_us in import_times:
+        totals[name.split(".")[0]] += self_us
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+@click.command("startup-report")
+@click.option("--module", default="backend.app", show_default=True, help="WSGI module gunicorn imports.")
+@click.option("--runs", default=3, show_default=True, help="Cold starts to measure.")
+@click.option("--top", default=15, show_default=True, help="Packages to list by import time.")
+def startup_report_command(module, runs, top):
+    """Report cold-start time, worker memory and import costs of the app."""
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    results = [probe_startup(module, project_root) for _ in range(runs)]
+
+    seconds = statistics.median(result["seconds"] for result in results)
+    max_rss_mb = max(result["max_rss_kb"] for result in results) / 1024
+    click.echo(f"Cold start of {module}: {seconds * 1000:.0f} ms (median of {runs})")
+    click.echo(f"Worker baseline memory: {max_rss_mb:.1f} MiB max RSS")
+    click.echo(f"Modules loaded: {results[-1]['modules']}")
+
+    click.echo(f"Import time by package (top {top}):")
+    for package, self_us in import_time_by_package(results[-1]["import_times"])[:top]:
+        click.echo(f"    {package:<30} {self_us / 1000:8.1f} ms")
+
+    lazy_loaded = results[-1]["lazy_loaded"]
+    if lazy_loaded:
+        click.echo(f"Loaded at startup but should be lazy: {', '.join(lazy_loaded)}")
+        raise SystemExit(1)
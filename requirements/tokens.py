@@ -0,0 +1,136 @@
+import itertools
+from datetime import datetime, timezone
+import click
+from flask import current_app
+from flask_jwt_extended import create_access_token, create_refresh_token
+from sqlalchemy import delete, or_
+from sqlalchemy.exc import IntegrityError
+from requirements.__init__ import db, jwt
+from requirements.identity import revoke_access_tokens
+from requirements.ttl_cache import TTLCache
+from models import RevokedToken, get_current_utc_time
+
+# Per-worker set of revoked token ids, so a token seen revoked is rejected
+# without a query. Entries live until the token itself expires, after which
+# the signature check rejects it anyway.
+revoked_tokens = TTLCache(maxsize=100000, ttl=0)
+
+# Revocations made by this worker, to prune the table every so often
+_revocations = itertools.count(1)
+
+
+class TokenAlreadyRevoked(Exception):
+    pass
+
+
+def issue_tokens(user_id, role_name, role_version):
+    """
+    Creates an access token carrying the role claims plus a refresh token that
+    can later be exchanged for a new pair without re-checking the password.
+    """
+    claims = {"role": role_name, "role_version": role_version}
+    return {
+        "access_token": create_access_token(
+            identity=str(user_id), additional_claims=claims
+        ),
+        "refresh_token": create_refresh_token(identity=str(user_id)),
+    }
+
+
+def revoke_token(jwt_payload):
+    """
+    Revokes a token. The unique jti column makes this atomic across workers: if
+    another request already revoked the same token, TokenAlreadyRevoked is raised.
+    """
+    jti = jwt_payload["jti"]
+    db.session.add(
+        RevokedToken(
+            jti=jti,
+            token_type=jwt_payload["type"],
+            user_id=int(jwt_payload["sub"]),
+            expires_at=datetime.fromtimestamp(jwt_payload["exp"], timezone.utc),
+        )
+    )
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        _remember_revoked(jwt_payload)
+        raise TokenAlreadyRevoked(jti)
+    _remember_revoked(jwt_payload)
+    if jwt_payload["type"] == "access":
+        revoke_access_tokens(jwt_payload["sub"], jwt_payload["iat"])
+
+    if next(_revocations) % current_app.config.get("REVOKED_TOKEN_PRUNE_INTERVAL", 100) == 0:
+        prune_revoked_tokens()
+
+
+def prune_revoked_tokens():
+    """
+    Deletes revocations of tokens that have expired: the signature check
+    rejects those on its own. Rows written before expires_at was recorded are
+    kept for the longest token lifetime. Returns the number of rows deleted.
+    """
+    now = get_current_utc_time()
+    max_lifetime = max(
+        current_app.config["JWT_ACCESS_TOKEN_EXPIRES"],
+        current_app.config["JWT_REFRESH_TOKEN_EXPIRES"],
+    )
+    result = db.session.execute(
+        delete(RevokedToken).where(
+            or_(
+                RevokedToken.expires_at < now,
+                RevokedToken.expires_at.is_(None) & (RevokedToken.revoked_at < now - max_lifetime),
+            )
+        )
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def _remember_revoked(jwt_payload):
+    remaining = jwt_payload["exp"] - datetime.now(timezone.utc).timestamp()
+    if remaining > 0:
+        revoked_tokens.set(jwt_payload["jti"], True, ttl=remaining)
+
+
+def access_token_revoked(identity, jwt_payload):
+    """
+    Whether an access token was revoked in any worker. Revoking an access
+    token moves its user's cutoff in the shared identity state to the token's
+    iat, which also revokes the user's older access tokens; the cutoff comes
+    with the identity lookup every request already does. Only when that state
+    could not be read is the revoked_tokens table asked instead.
+    """
+    if identity.access_revoked_before is None:
+        return _revoked_in_db(jwt_payload)
+    return jwt_payload["iat"] <= identity.access_revoked_before
+
+
+def _revoked_in_db(jwt_payload):
+    revoked = (
+        db.session.query(RevokedToken.id).filter_by(jti=jwt_payload["jti"]).first()
+        is not None
+    )
+    if revoked:
+        _remember_revoked(jwt_payload)
+    return revoked
+
+
+@jwt.token_in_blocklist_loader
+def _is_token_revoked(jwt_header, jwt_payload):
+    if revoked_tokens.get(jwt_payload["jti"]):
+        return True
+
+    # Access tokens are checked against the user's shared cutoff when the user
+    # is loaded (see requirements.identity), so they need no query here.
+    # Refresh tokens are rare enough to ask the shared table.
+    if jwt_payload["type"] != "refresh":
+        return False
+    return _revoked_in_db(jwt_payload)
+
+
+@click.command("prune-revoked-tokens")
+def prune_revoked_tokens_command():
+    """Delete revocations of tokens that have expired."""
+    click.echo(f"Deleted {prune_revoked_tokens()} expired token revocations.")
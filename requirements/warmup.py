@@ -0,0 +1,37 @@
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import configure_mappers
+from requirements.__init__ import db
+from requirements.conditional import table_version
+from requirements.identity import load_identity
+from requirements.notifications import notifications
+from requirements.query_plans import _plan_queries
+from models import Requirement, InterviewStatus, Joining, ITAssets, SoftwareLicense
+
+
+def warmup(app):
+    """
+    Prepares a preloaded app in the gunicorn master so forked workers inherit
+    the work instead of each repeating it on their first requests: mappers are
+    configured, and the statements most requests run (identity lookup, table
+    versions and the filtered listings) are compiled into the engine's
+    statement cache, as are the notification email templates. The rows those
+    statements return are thrown away. The engine's connections, and with them
+    SQLite's page cache, are disposed afterwards so no connection is shared
+    across the fork.
+    """
+    with app.app_context():
+        configure_mappers()
+        notifications.load("email_template")
+        try:
+            load_identity(-1)  # Compiles the identity query; unknown ids are not cached
+            for model in (Requirement, InterviewStatus, Joining, ITAssets, SoftwareLicense):
+                table_version(model)
+            for _, query, _ in _plan_queries():
+                query.limit(1).all()
+            app.logger.info("Warmed up the statement cache")
+        except SQLAlchemyError:
+            # e.g. migrations not applied yet; workers will simply start cold
+            app.logger.warning("Warmup skipped: database not ready", exc_info=True)
+        finally:
+            db.session.remove()
+            db.engine.dispose()
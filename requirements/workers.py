@@ -0,0 +1,107 @@
+import os
+import threading
+from datetime import timedelta
+from sqlalchemy import update
+from requirements.__init__ import db
+from models import get_current_utc_time
+
+
+class PerProcess:
+    """
+    Holds a resource (a thread or process pool, a background thread, open
+    connections) that belongs to the process using it. It is created lazily
+    on first use, so a process forked after it was created (e.g. a worker of
+    a preloading gunicorn master) builds its own instead of inheriting the
+    parent's.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self._value = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        pid = os.getpid()
+        if self._value is None or self._pid != pid:
+            with self._lock:
+                if self._value is None or self._pid != pid:
+                    self._value = self.factory()
+                    self._pid = pid
+        return self._value
+
+    def exists(self):
+        """
+        Returns whether this process already created its resource.
+        """
+        return self._value is not None and self._pid == os.getpid()
+
+    def reset(self, close=None):
+        """
+        Forgets the resource so the next get() creates a new one. close is
+        called with the old resource if this process created it.
+        """
+        with self._lock:
+            value, owned = self._value, self._pid == os.getpid()
+            self._value = None
+            self._pid = None
+        if value is not None and owned and close is not None:
+            close(value)
+
+
+# Rows of a work queue table (status, attempts and last_modified_date columns)
+# are claimed and recovered with the two helpers below. Both commit.
+
+
+def claim(model, key, from_status, to_status, **values):
+    """
+    Compare-and-set: moves the row with primary key key from from_status to
+    to_status and counts the attempt. Returns whether this caller won the
+    row; when several workers race for it exactly one does.
+    """
+    primary_key = model.__mapper__.primary_key[0]
+    result = db.session.execute(
+        update(model)
+        .execution_options(synchronize_session=False)
+        .where(primary_key == key, model.status == from_status)
+        .values(
+            status=to_status,
+            attempts=model.attempts + 1,
+            last_modified_date=get_current_utc_time(),
+            **values,
+        )
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+
+def requeue_stale(
+    model,
+    running_status,
+    queued_status,
+    failed_status,
+    stale_after,
+    max_attempts,
+    requeue_values=None,
+    failed_values=None,
+):
+    """
+    Rows left in running_status without a last_modified_date update for
+    stale_after seconds belong to a worker that went away: they are put back
+    in queued_status, or moved to failed_status once out of attempts.
+    """
+    stale = get_current_utc_time() - timedelta(seconds=stale_after)
+    is_stale = (model.status == running_status, model.last_modified_date < stale)
+    db.session.execute(
+        update(model)
+        .execution_options(synchronize_session=False)
+        .where(*is_stale, model.attempts >= max_attempts)
+        .values(status=failed_status, **(failed_values or {}))
+    )
+    db.session.execute(
+        update(model)
+        .execution_options(synchronize_session=False)
+        .where(*is_stale)
+        .values(status=queued_status, **(requeue_values or {}))
+    )
+    db.session.commit()
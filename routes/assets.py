@@ -1,14 +1,31 @@
-import pandas as pd
-from io import BytesIO
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
 from models import ITAssets
 from requirements.__init__ import db
 from requirements.auth import role_required
+from requirements.cache import response_cache
+from requirements.conditional import conditional_list, conditional_detail
+from requirements.listing import paginate, apply_filters, parse_fields, project, list_endpoint
+from requirements.exports import EXPORTS, export_response
 from flask_cors import CORS
 
 assets_bp = Blueprint("assets_bp", __name__)
 
+# Columns the IT assets listing can be filtered and sorted on
+ASSET_FILTERS = {
+    name: getattr(ITAssets, name)
+    for name in (
+        "asset_id",
+        "employee_id",
+        "laptop",
+        "monitor",
+        "id_card",
+        "employment_status",
+        "created_date",
+        "last_modified_date",
+    )
+}
+
 CORS(
     assets_bp,
     origins=[
@@ -53,51 +70,29 @@ def create_it_assets():
 @assets_bp.route("/it_assets", methods=["GET"])
 @jwt_required()
 @role_required(roles=["IT-Admin", "Super-Admin"])
+@conditional_list(ITAssets)
+@response_cache.cached(ITAssets)
+@list_endpoint(ASSET_FILTERS)
 def get_all_it_assets():
-    assets = ITAssets.query.all()
-    assets_list = [
-        {
-            "asset_id": asset.asset_id,
-            "employee_id": asset.employee_id,
-            "laptop": asset.laptop,
-            "monitor": asset.monitor,
-            "wired_keyboard": asset.wired_keyboard,
-            "wired_mouse": asset.wired_mouse,
-            "wireless_mouse": asset.wireless_mouse,
-            "airtel_dongle": asset.airtel_dongle,
-            "id_card": asset.id_card,
-            "employment_status": asset.employment_status,
-            "created_date": asset.created_date,
-            "last_modified_date": asset.last_modified_date,
-        }
-        for asset in assets
-    ]
-    return jsonify({"count": len(assets), "assets": assets_list})
+    fields = parse_fields(ITAssets)
+    query = apply_filters(ITAssets.query, ASSET_FILTERS)
+    page = paginate(query, ITAssets.asset_id, sortable=ASSET_FILTERS, fields=fields)
+    assets = page.items
+    assets_list = [asset.to_dict(fields) for asset in assets]
+    return jsonify({"count": len(assets), "assets": assets_list, "next_cursor": page.next_cursor})
 
 
 @assets_bp.route("/it_assets/<int:id>", methods=["GET"])
 @jwt_required()
 @role_required(roles=["IT-Admin", "Super-Admin"])
+@conditional_detail(ITAssets)
+@response_cache.cached(ITAssets)
 def get_it_asset(id):
-    asset = ITAssets.query.get(id)
+    fields = parse_fields(ITAssets)
+    asset = project(ITAssets.query, ITAssets, fields).get(id)
     if not asset:
         return jsonify({"message": "IT asset not found"}), 404
-    return jsonify(
-        {
-            "asset_id": asset.asset_id,
-            "employee_id": asset.employee_id,
-            "laptop": asset.laptop,
-            "monitor": asset.monitor,
-            "wired_keyboard": asset.wired_keyboard,
-            "wired_mouse": asset.wired_mouse,
-            "wireless_mouse": asset.wireless_mouse,
-            "airtel_dongle": asset.airtel_dongle,
-            "id_card": asset.id_card,
-            "employment_status": asset.employment_status,
-            "created_date": asset.created_date,
-            "last_modified_date": asset.last_modified_date,
-        }
-    )
+    return jsonify(asset.to_dict(fields))
 
 
 @assets_bp.route("/it_assets/<int:id>", methods=["PUT"])
@@ -133,96 +128,23 @@ def delete_it_asset(id):
 @jwt_required()
 @role_required(roles=["IT-Admin", "Super-Admin"])
 def export_all_it_assets():
-    # Fetch all IT assets
-    assets = ITAssets.query.all()
-
-    # If no IT assets found
-    if not assets:
-        return jsonify({"message": "No IT assets found"}), 404
-
-    # Prepare data for export
-    data = []
-    for asset in assets:
-        data.append({
-            "asset_id": asset.asset_id,
-            "employee_id": asset.employee_id,
-            "laptop": asset.laptop,
-            "monitor": asset.monitor,
-            "wired_keyboard": asset.wired_keyboard,
-            "wired_mouse": asset.wired_mouse,
-            "wireless_mouse": asset.wireless_mouse,
-            "airtel_dongle": asset.airtel_dongle,
-            "id_card": asset.id_card,
-            "employment_status": asset.employment_status,
-            "created_date": asset.created_date,
-            "last_modified_date": asset.last_modified_date
-        })
-
-    # Convert the data into a pandas DataFrame
-    df = pd.DataFrame(data)
-
-    # Create a BytesIO object to store the Excel file in memory
-    excel_file = BytesIO()
-
-    # Write the DataFrame to the Excel file using openpyxl engine
-    with pd.ExcelWriter(excel_file, engine="openpyxl") as writer:
-        df.to_excel(writer, index=False, sheet_name="IT Assets")
-
-    # Seek to the beginning of the file so it can be read
-    excel_file.seek(0)
-
-    # Send the file as a response with an appropriate content type and filename
-    return send_file(
-        excel_file,
-        as_attachment=True,
-        download_name="it_assets.xlsx",  # You can modify the filename as needed
-        mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    # Rows are streamed from the database as xlsx, csv or ndjson (?format=)
+    return export_response(
+        EXPORTS["it_assets"],
+        filterable=ASSET_FILTERS,
+        not_found="No IT assets found",
     )
 
+
 # Export a specific IT asset by ID to Excel
 @assets_bp.route('/it_assets/<int:id>/export', methods=['GET'])
 @jwt_required()
 @role_required(roles=["IT-Admin", "Super-Admin"])
 def export_single_it_asset(id):
-    # Fetch the IT asset by its ID
-    asset = ITAssets.query.get(id)
-
-    if not asset:
-        return jsonify({"message": "IT asset not found"}), 404
-
-    # Prepare data for export
-    data = [{
-        "asset_id": asset.asset_id,
-        "employee_id": asset.employee_id,
-        "laptop": asset.laptop,
-        "monitor": asset.monitor,
-        "wired_keyboard": asset.wired_keyboard,
-        "wired_mouse": asset.wired_mouse,
-        "wireless_mouse": asset.wireless_mouse,
-        "airtel_dongle": asset.airtel_dongle,
-        "id_card": asset.id_card,
-        "employment_status": asset.employment_status,
-        "created_date": asset.created_date,
-        "last_modified_date": asset.last_modified_date
-    }]
-
-    # Convert the data into a pandas DataFrame
-    df = pd.DataFrame(data)
-
-    # Create a BytesIO object to store the Excel file in memory
-    excel_file = BytesIO()
-
-    # Write the DataFrame to the Excel file using openpyxl engine
-    with pd.ExcelWriter(excel_file, engine="openpyxl") as writer:
-        df.to_excel(writer, index=False, sheet_name="IT Asset")
-
-    # Seek to the beginning of the file so it can be read
-    excel_file.seek(0)
-
-    # Send the file as a response with an appropriate content type and filename
-    return send_file(
-        excel_file,
-        as_attachment=True,
-        download_name=f"it_asset_{id}.xlsx",  # Dynamically naming the file based on asset ID
-        mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    return export_response(
+        EXPORTS["it_assets"],
+        where=ITAssets.asset_id == id,
+        sheet_name="IT Asset",
+        download_name=f"it_asset_{id}.xlsx",
+        not_found="IT asset not found",
     )
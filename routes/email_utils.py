@@ -1,27 +1,6 @@
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from requirements.mail import mail_transport
 
 
 def send_email(to_email, subject, body):
-    sender_email = "support@v97-cems.com"  # Replace with your email
-    sender_password = "@Vec@123!s"  # Replace with your password
-    smtp_server = "smtpout.secureserver.net"  # Replace with your SMTP server
-    smtp_port = 587  # Adjust the port if needed
-
-    msg = MIMEMultipart()
-    msg["From"] = sender_email
-    msg["To"] = to_email
-    msg["Subject"] = subject
-
-    msg.attach(MIMEText(body, "plain"))
-
-    try:
-        with smtplib.SMTP(smtp_server, smtp_port) as server:
-            server.set_debuglevel(1)  # Enable debugging
-            server.starttls()
-            server.login(sender_email, sender_password)
-            server.sendmail(sender_email, to_email, msg.as_string())
-        print("Email sent successfully")
-    except Exception as e:
-        print(f"Failed to send email: {e}")
+    # Sent over a pooled SMTP session; errors propagate to the caller
+    mail_transport.send(mail_transport.message(to_email, subject, body))
@@ -0,0 +1,164 @@
+import os
+from flask import Blueprint, request, jsonify, send_file, url_for, current_app
+from flask_jwt_extended import jwt_required, current_user
+from models import db, ExportJob
+from requirements.auth import has_role
+from requirements.exports import (
+    EXPORTS,
+    EXPORT_FORMATS,
+    export_mimetype,
+    prepare_sheets,
+    send_workbook,
+)
+from requirements.export_jobs import export_jobs, DONE
+from requirements.listing import apply_filters
+from routes.requirement import REQUIREMENT_FILTERS
+from routes.joining import JOINING_FILTERS
+from routes.assets import ASSET_FILTERS
+from routes.licenses import LICENSE_FILTERS
+from flask_cors import CORS
+
+exports_bp = Blueprint("exports_bp", __name__)
+
+# Columns each export can be filtered on (the same whitelists as the listings)
+EXPORT_FILTERS = {
+    "requirements": REQUIREMENT_FILTERS,
+    "joining": JOINING_FILTERS,
+    "it_assets": ASSET_FILTERS,
+    "licenses": LICENSE_FILTERS,
+}
+
+CORS(
+    exports_bp,
+    origins=[
+        "http://localhost:3000",
+        "http://localhost:8080",
+        "http://127.0.0.1:3000",
+        "https://cogs-354de766c1e7.herokuapp.com",
+        "https://www.v97-cems.com"
+    ],
+    supports_credentials=True,
+)
+
+
+def _job_response(job):
+    data = job.to_dict()
+    if job.status == DONE:
+        data["download_url"] = url_for(
+            "exports_bp.download_export_job", job_id=job.job_id
+        )
+    return data
+
+
+def _get_own_job(job_id):
+    # Jobs are only visible to the user who requested them
+    job = db.session.get(ExportJob, job_id)
+    if not job or job.user_id != current_user.id:
+        return None
+    return job
+
+
+# Queue an export to be built in the background
+@exports_bp.route("/exports", methods=["POST"])
+@jwt_required()
+def create_export_job():
+    data = request.get_json() or {}
+    entity = data.get("entity")
+    export_format = data.get("format", "xlsx")
+    filters = data.get("filter", [])
+
+    if entity not in EXPORTS:
+        return jsonify({"message": f"Unknown export '{entity}'"}), 400
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({"message": f"Unsupported format '{export_format}'"}), 400
+    if isinstance(filters, str):
+        filters = [filters]
+
+    spec = EXPORTS[entity]
+    if not has_role(spec.roles):
+        return {"msg": "Permission denied"}, 403
+
+    # Reject invalid filters now rather than failing the job later
+    apply_filters(spec.statement(), EXPORT_FILTERS[entity], filters)
+
+    job = export_jobs.enqueue(entity, export_format, filters, user_id=current_user.id)
+    return (
+        jsonify(_job_response(job)),
+        202,
+        {"Location": url_for("exports_bp.get_export_job", job_id=job.job_id)},
+    )
+
+
+# Export selected records of several entities into one workbook, one sheet each
+@exports_bp.route("/exports/batch", methods=["POST"])
+@jwt_required()
+def export_batch():
+    """
+    Takes {"joining": [ids], "it_assets": [ids], "licenses": [ids], ...} and
+    returns a single workbook with one sheet per requested entity.
+    """
+    data = request.get_json() or {}
+    if not isinstance(data, dict) or not data:
+        return jsonify({"message": "Expected a mapping of entity to a list of ids"}), 400
+
+    max_ids = current_app.config.get("EXPORT_BATCH_MAX_IDS", 1000)
+    selections = []
+    for entity, ids in data.items():
+        if entity not in EXPORTS:
+            return jsonify({"message": f"Unknown export '{entity}'"}), 400
+        if not isinstance(ids, list) or not all(
+            isinstance(id, int) and not isinstance(id, bool) for id in ids
+        ):
+            return jsonify({"message": f"'{entity}' must be a list of integer ids"}), 400
+        if len(ids) > max_ids:
+            return jsonify({"message": f"At most {max_ids} ids per entity"}), 400
+
+        spec = EXPORTS[entity]
+        if not has_role(spec.roles):
+            return {"msg": f"Permission denied for '{entity}'"}, 403
+        if ids:
+            selections.append((spec, list(dict.fromkeys(ids))))
+
+    if not selections:
+        return jsonify({"message": "No ids to export"}), 400
+
+    sheets = prepare_sheets(selections)
+    if not any(rows for _, _, rows in sheets):
+        return jsonify({"message": "No records found"}), 404
+
+    return send_workbook(sheets, "export.xlsx")
+
+
+# Poll an export job's status and progress
+@exports_bp.route("/exports/<job_id>", methods=["GET"])
+@jwt_required()
+def get_export_job(job_id):
+    job = _get_own_job(job_id)
+    if not job:
+        return jsonify({"message": "Export job not found"}), 404
+
+    # Pick up jobs whose worker went away
+    export_jobs.ensure_started()
+    if export_jobs.is_stale(job):
+        export_jobs.recover()
+        db.session.refresh(job)
+
+    return jsonify(_job_response(job)), 200
+
+
+# Download a finished export
+@exports_bp.route("/exports/<job_id>/download", methods=["GET"])
+@jwt_required()
+def download_export_job(job_id):
+    job = _get_own_job(job_id)
+    if not job:
+        return jsonify({"message": "Export job not found"}), 404
+    if job.status != DONE or not job.file_path or not os.path.exists(job.file_path):
+        return jsonify({"message": "Export is not ready", "status": job.status}), 409
+
+    return send_file(
+        job.file_path,
+        as_attachment=True,
+        download_name=export_jobs.download_name(job),
+        mimetype=export_mimetype(job.export_format),
+    )
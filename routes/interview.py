@@ -3,12 +3,30 @@ from flask_cors import CORS
 from flask_jwt_extended import jwt_required
 from requirements.__init__ import db
 from requirements.auth import role_required
+from requirements.cache import response_cache
+from requirements.conditional import conditional_list, conditional_detail
+from requirements.listing import paginate, apply_filters, parse_fields, project, list_endpoint
 from models import InterviewStatus
 from datetime import datetime
 
 # Blueprint setup
 interview_bp = Blueprint('interview_bp', __name__)
 
+# Columns the interview listing can be filtered and sorted on
+INTERVIEW_FILTERS = {
+    name: getattr(InterviewStatus, name)
+    for name in (
+        'interview_id',
+        'requirement_id',
+        'interview_status',
+        'interview_round',
+        'candidate_name',
+        'interviewer_name',
+        'interview_date',
+        'last_modified_date',
+    )
+}
+
 # CORS configuration
 CORS(
     interview_bp,
@@ -44,20 +62,30 @@ def create_interview_status():
 @interview_bp.route('/interview/<int:id>', methods=['GET'])
 @jwt_required()
 @role_required(roles=['Admin', 'Super-Admin'])
+@conditional_detail(InterviewStatus)
+@response_cache.cached(InterviewStatus)
 def get_interview_status(id):
-    interview_status = InterviewStatus.query.get(id)
+    fields = parse_fields(InterviewStatus)
+    interview_status = project(InterviewStatus.query, InterviewStatus, fields).get(id)
     if not interview_status:
         return jsonify({"message": "Interview status not found"}), 404
-    return jsonify(interview_status.to_dict())
+    return jsonify(interview_status.to_dict(fields))
 
 # Get all interview statuses
 @interview_bp.route('/interview', methods=['GET'])
 @jwt_required()
 @role_required(roles=['Admin', 'Super-Admin'])
+@conditional_list(InterviewStatus)
+@response_cache.cached(InterviewStatus)
+@list_endpoint(INTERVIEW_FILTERS)
 def get_all_interview_statuses():
-    interview_statuses = InterviewStatus.query.all()
-    result = [status.to_dict() for status in interview_statuses]
-    return jsonify(result)
+    fields = parse_fields(InterviewStatus)
+    query = apply_filters(InterviewStatus.query, INTERVIEW_FILTERS)
+    page = paginate(query, InterviewStatus.interview_id, sortable=INTERVIEW_FILTERS, fields=fields)
+    result = [status.to_dict(fields) for status in page.items]
+    if not page.paginated:
+        return jsonify(result)
+    return jsonify({"count": len(result), "interview_statuses": result, "next_cursor": page.next_cursor})
 
 # Update an existing interview status
 @interview_bp.route('/interview/<int:id>', methods=['PUT'])
@@ -90,19 +118,3 @@ def delete_interview_status(id):
     db.session.delete(interview_status)
     db.session.commit()
     return jsonify({"message": "Interview status deleted successfully"})
-
-# Add the to_dict method to the InterviewStatus class
-def to_dict(self):
-    return {
-        'interview_id': self.interview_id,
-        'requirement_id': self.requirement_id,
-        'interview_status': self.interview_status,
-        'interview_round': self.interview_round,
-        'candidate_name': self.candidate_name,
-        'interviewer_name': self.interviewer_name,
-        'interview_date': self.interview_date.isoformat() if self.interview_date else None,
-        'last_modified_date': self.last_modified_date.isoformat(),
-    }
-
-# Attach the to_dict method to the InterviewStatus class
-InterviewStatus.to_dict = to_dict
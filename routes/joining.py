@@ -1,14 +1,34 @@
-import pandas as pd
-from io import BytesIO
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
 from requirements.__init__ import db
 from models import Joining
 from requirements.auth import role_required
+from requirements.cache import response_cache
+from requirements.conditional import conditional_list, conditional_detail
+from requirements.listing import paginate, apply_filters, parse_fields, project, list_endpoint
+from requirements.exports import EXPORTS, export_response
 from flask_cors import CORS
 
 joining_bp = Blueprint("joining_bp", __name__)
 
+# Columns the joining listing can be filtered and sorted on
+JOINING_FILTERS = {
+    name: getattr(Joining, name)
+    for name in (
+        "employee_id",
+        "first_name",
+        "last_name",
+        "emp_email_id",
+        "business_unit",
+        "business_title",
+        "resource_type",
+        "reporting_manager",
+        "employment_status",
+        "created_date",
+        "last_modified_date",
+    )
+}
+
 CORS(
     joining_bp,
     origins=[
@@ -48,19 +68,31 @@ def create_joining():
 @joining_bp.route("/joining/<int:id>", methods=["GET"])
 @jwt_required()
 @role_required(roles=["HR", "Super-Admin"])
+@conditional_detail(Joining)
+@response_cache.cached(Joining)
 def get_joining(id):
-    joining = Joining.query.get(id)
+    fields = parse_fields(Joining)
+    joining = project(Joining.query, Joining, fields).get(id)
     if not joining:
         return jsonify({"message": "Joining not found"}), 404
-    return jsonify(joining.to_dict())
+    return jsonify(joining.to_dict(fields))
 
 # Get all joining records
 @joining_bp.route("/joining", methods=["GET"])
 @jwt_required()
 @role_required(roles=["HR", "Super-Admin"])
+@conditional_list(Joining)
+@response_cache.cached(Joining)
+@list_endpoint(JOINING_FILTERS)
 def get_all_joining():
-    joinings = Joining.query.all()
-    return jsonify({"count": len(joinings), "joinings": [joi.to_dict() for joi in joinings]})
+    fields = parse_fields(Joining)
+    query = apply_filters(Joining.query, JOINING_FILTERS)
+    page = paginate(query, Joining.employee_id, sortable=JOINING_FILTERS, fields=fields)
+    return jsonify({
+        "count": len(page.items),
+        "joinings": [joi.to_dict(fields) for joi in page.items],
+        "next_cursor": page.next_cursor,
+    })
 
 # Update a specific joining record by ID (Accessible to HR and Super-Admin)
 @joining_bp.route("/joining/<int:id>", methods=["PUT"])
@@ -96,98 +128,23 @@ def delete_joining(id):
 @jwt_required()
 @role_required(roles=["HR", "Super-Admin"])
 def export_all_joining():
-    # Fetch all joining records
-    joinings = Joining.query.all()
-
-    # If no joining records found
-    if not joinings:
-        return jsonify({"message": "No joining records found"}), 404
-
-    # Prepare data for export
-    data = []
-    for joining in joinings:
-        data.append({
-            "employee_id": joining.employee_id,
-            "first_name": joining.first_name,
-            "last_name": joining.last_name,
-            "emp_email_id": joining.emp_email_id,
-            "employee_address": joining.employee_address,
-            "business_unit": joining.business_unit,
-            "business_title": joining.business_title,
-            "resource_type": joining.resource_type,
-            "contact_number": joining.contact_number,
-            "reporting_manager": joining.reporting_manager,
-            "employment_status": joining.employment_status,
-            "created_date": joining.created_date,
-            "last_modified_date": joining.last_modified_date
-        })
-
-    # Convert the data into a pandas DataFrame
-    df = pd.DataFrame(data)
-
-    # Create a BytesIO object to store the Excel file in memory
-    excel_file = BytesIO()
-
-    # Write the DataFrame to the Excel file using openpyxl engine
-    with pd.ExcelWriter(excel_file, engine="openpyxl") as writer:
-        df.to_excel(writer, index=False, sheet_name="Joinings")
-
-    # Seek to the beginning of the file so it can be read
-    excel_file.seek(0)
-
-    # Send the file as a response with an appropriate content type and filename
-    return send_file(
-        excel_file,
-        as_attachment=True,
-        download_name="joinings.xlsx",  # You can modify the filename as needed
-        mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    # Rows are streamed from the database as xlsx, csv or ndjson (?format=)
+    return export_response(
+        EXPORTS["joining"],
+        filterable=JOINING_FILTERS,
+        not_found="No joining records found",
     )
 
+
 # Export a Single Joining Record by ID to Excel
 @joining_bp.route('/joining/<int:id>/export', methods=['GET'])
 @jwt_required()
 @role_required(roles=["HR", "Super-Admin"])
 def export_single_joining(id):
-    # Fetch the joining record by its ID
-    joining = Joining.query.get(id)
-
-    if not joining:
-        return jsonify({"message": "Joining not found"}), 404
-
-    # Prepare data for export
-    data = [{
-        "employee_id": joining.employee_id,
-        "first_name": joining.first_name,
-        "last_name": joining.last_name,
-        "emp_email_id": joining.emp_email_id,
-        "employee_address": joining.employee_address,
-        "business_unit": joining.business_unit,
-        "business_title": joining.business_title,
-        "resource_type": joining.resource_type,
-        "contact_number": joining.contact_number,
-        "reporting_manager": joining.reporting_manager,
-        "employment_status": joining.employment_status,
-        "created_date": joining.created_date,
-        "last_modified_date": joining.last_modified_date
-    }]
-
-    # Convert the data into a pandas DataFrame
-    df = pd.DataFrame(data)
-
-    # Create a BytesIO object to store the Excel file in memory
-    excel_file = BytesIO()
-
-    # Write the DataFrame to the Excel file using openpyxl engine
-    with pd.ExcelWriter(excel_file, engine="openpyxl") as writer:
-        df.to_excel(writer, index=False, sheet_name="Joining")
-
-    # Seek to the beginning of the file so it can be read
-    excel_file.seek(0)
-
-    # Send the file as a response with an appropriate content type and filename
-    return send_file(
-        excel_file,
-        as_attachment=True,
-        download_name=f"joining_{id}.xlsx",  # Dynamically naming the file based on joining ID
-        mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    return export_response(
+        EXPORTS["joining"],
+        where=Joining.employee_id == id,
+        sheet_name="Joining",
+        download_name=f"joining_{id}.xlsx",
+        not_found="Joining not found",
     )
@@ -1,14 +1,22 @@
-import pandas as pd
-from io import BytesIO
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
-from models import db, SoftwareLicense, LicenseAttribute, Joining
+from models import db, SoftwareLicense, LicenseAttribute, Joining, get_current_utc_time
 from requirements.auth import role_required
+from requirements.cache import response_cache
+from requirements.conditional import conditional_list, conditional_detail
+from requirements.listing import paginate, apply_filters, parse_fields, project, list_endpoint
+from requirements.exports import EXPORTS, export_response
 from sqlalchemy.orm import joinedload  # Importing joinedload to eagerly load relationships
 from flask_cors import CORS
 
 licenses_bp = Blueprint('licenses_bp', __name__)
 
+# Columns the licenses listing can be filtered and sorted on
+LICENSE_FILTERS = {
+    name: getattr(SoftwareLicense, name)
+    for name in ("license_id", "employee_id", "created_date", "last_modified_date")
+}
+
 CORS(
     licenses_bp,
     origins=[
@@ -33,10 +41,10 @@ def create_license():
     if not employee:
         return jsonify({"message": "Employee not found"}), 404
 
-    # Create new software license
+    # Create new software license (flush to get its ID; committed together with its attributes)
     new_license = SoftwareLicense(employee_id=data['employee_id'])
     db.session.add(new_license)
-    db.session.commit()
+    db.session.flush()
 
     # Add dynamic attributes if provided
     if 'attributes' in data:
@@ -47,7 +55,7 @@ def create_license():
                 attribute_value=attribute['attribute_value']
             )
             db.session.add(new_attribute)
-        db.session.commit()
+    db.session.commit()
 
     return jsonify({"message": "Software license created successfully", "license_id": new_license.license_id}), 201
 
@@ -55,57 +63,49 @@ def create_license():
 @licenses_bp.route('/licenses', methods=['GET'])
 @jwt_required()
 @role_required(roles=['IT-Admin', 'Super-Admin'])
+@conditional_list(SoftwareLicense)
+@response_cache.cached(SoftwareLicense, LicenseAttribute)
+@list_endpoint(LICENSE_FILTERS)
 def get_all_licenses():
     employee_id = request.args.get('employee_id')
 
-    # Fetch licenses and include associated attributes using joinedload
+    fields = parse_fields(SoftwareLicense)
+
+    # Fetch licenses and include associated attributes (when requested) using joinedload
+    query = SoftwareLicense.query
+    if fields is None or 'attributes' in fields:
+        query = query.options(joinedload(SoftwareLicense.dynamic_attributes))
     if employee_id:
-        licenses = SoftwareLicense.query.filter_by(employee_id=employee_id).options(joinedload(SoftwareLicense.dynamic_attributes)).all()
-    else:
-        licenses = SoftwareLicense.query.options(joinedload(SoftwareLicense.dynamic_attributes)).all()
+        query = query.filter_by(employee_id=employee_id)
+    query = apply_filters(query, LICENSE_FILTERS)
+    page = paginate(query, SoftwareLicense.license_id, sortable=LICENSE_FILTERS, fields=fields)
+    licenses = page.items
 
     if not licenses:
         return jsonify({"message": "No licenses found"}), 404
 
-    result = [
-        {
-            "license_id": license.license_id,
-            "employee_id": license.employee_id,
-            "created_date": license.created_date,
-            "last_modified_date": license.last_modified_date,
-            "attributes": [
-                {"attribute_name": attr.attribute_name, "attribute_value": attr.attribute_value}
-                for attr in license.dynamic_attributes
-            ]
-        } for license in licenses
-    ]
-    return jsonify({"count": len(licenses), "licenses": result})
+    result = [license.to_dict(fields) for license in licenses]
+    return jsonify({"count": len(licenses), "licenses": result, "next_cursor": page.next_cursor})
 
 # Get a specific Software License by ID (with attributes)
 @licenses_bp.route('/licenses/<int:license_id>', methods=['GET'])
 @jwt_required()
 @role_required(roles=['IT-Admin', 'Super-Admin'])
+@conditional_detail(SoftwareLicense, id_arg="license_id")
+@response_cache.cached(SoftwareLicense, LicenseAttribute)
 def get_license(license_id):
-    # Fetch license and include associated attributes using joinedload
-    license = SoftwareLicense.query.filter_by(license_id=license_id).options(joinedload(SoftwareLicense.dynamic_attributes)).first()
+    fields = parse_fields(SoftwareLicense)
+
+    # Fetch license and include associated attributes (when requested) using joinedload
+    query = project(SoftwareLicense.query, SoftwareLicense, fields).filter_by(license_id=license_id)
+    if fields is None or 'attributes' in fields:
+        query = query.options(joinedload(SoftwareLicense.dynamic_attributes))
+    license = query.first()
 
     if not license:
         return jsonify({"message": "License not found"}), 404
 
-    license_data = {
-        "license_id": license.license_id,
-        "employee_id": license.employee_id,
-        "created_date": license.created_date,
-        "last_modified_date": license.last_modified_date,
-        "attributes": [
-            {
-                "attribute_name": attr.attribute_name,
-                "attribute_value": attr.attribute_value
-            } for attr in license.dynamic_attributes
-        ]
-    }
-
-    return jsonify(license_data), 200
+    return jsonify(license.to_dict(fields)), 200
 
 # Update a Software License (update dynamic attributes)
 @licenses_bp.route('/licenses/<int:license_id>', methods=['PUT'])
@@ -125,6 +125,9 @@ def update_license(license_id):
         LicenseAttribute.query.filter_by(license_id=license_id).delete()
         db.session.commit()
 
+        # Attributes have no timestamp of their own; touch the license so ETags change
+        license.last_modified_date = get_current_utc_time()
+
         for attribute in data['attributes']:
             new_attribute = LicenseAttribute(
                 license_id=license_id,
@@ -165,87 +168,25 @@ def delete_license(license_id):
 @jwt_required()
 @role_required(roles=['IT-Admin', 'Super-Admin'])
 def export_all_licenses():
-    # Fetch all licenses with their attributes using joinedload
-    licenses = SoftwareLicense.query.options(joinedload(SoftwareLicense.dynamic_attributes)).all()
-
-    # If no licenses found
-    if not licenses:
+    # Licenses without any attribute contribute no rows, as before
+    if not db.session.query(SoftwareLicense.license_id).first():
         return jsonify({"message": "No licenses found"}), 404
 
-    # Prepare data for export
-    data = []
-    for license in licenses:
-        for attr in license.dynamic_attributes:
-            data.append({
-                "license_id": license.license_id,
-                "employee_id": license.employee_id,
-                "created_date": license.created_date,
-                "last_modified_date": license.last_modified_date,
-                "attribute_name": attr.attribute_name,
-                "attribute_value": attr.attribute_value
-            })
-
-    # Convert the data into a pandas DataFrame
-    df = pd.DataFrame(data)
-
-    # Create a BytesIO object to store the Excel file in memory
-    excel_file = BytesIO()
-
-    # Write the DataFrame to the Excel file using openpyxl engine
-    with pd.ExcelWriter(excel_file, engine="openpyxl") as writer:
-        df.to_excel(writer, index=False, sheet_name="Licenses")
-
-    # Seek to the beginning of the file so it can be read
-    excel_file.seek(0)
-
-    # Send the file as a response with an appropriate content type and filename
-    return send_file(
-        excel_file,
-        as_attachment=True,
-        download_name="licenses.xlsx",  # You can modify the filename as needed
-        mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
+    # One row per license attribute, as xlsx, csv or ndjson (?format=)
+    return export_response(EXPORTS["licenses"], filterable=LICENSE_FILTERS)
+
 
 # Export a Single License by ID to Excel
 @licenses_bp.route('/licenses/<int:license_id>/export', methods=['GET'])
 @jwt_required()
 @role_required(roles=['IT-Admin', 'Super-Admin'])
 def export_single_license(license_id):
-    # Fetch the license by its ID and include associated attributes
-    license = SoftwareLicense.query.filter_by(license_id=license_id).options(joinedload(SoftwareLicense.dynamic_attributes)).first()
-
-    if not license:
+    if not db.session.get(SoftwareLicense, license_id):
         return jsonify({"message": "License not found"}), 404
 
-    # Prepare data for export
-    data = []
-    for attr in license.dynamic_attributes:
-        data.append({
-            "license_id": license.license_id,
-            "employee_id": license.employee_id,
-            "created_date": license.created_date,
-            "last_modified_date": license.last_modified_date,
-            "attribute_name": attr.attribute_name,
-            "attribute_value": attr.attribute_value
-        })
-
-    # Convert the data into a pandas DataFrame
-    df = pd.DataFrame(data)
-
-    # Create a BytesIO object to store the Excel file in memory
-    excel_file = BytesIO()
-
-    # Write the DataFrame to the Excel file using openpyxl engine
-    with pd.ExcelWriter(excel_file, engine="openpyxl") as writer:
-        df.to_excel(writer, index=False, sheet_name="License")
-
-    # Seek to the beginning of the file so it can be read
-    excel_file.seek(0)
-
-    # Send the file as a response with an appropriate content type and filename
-    return send_file(
-        excel_file,
-        as_attachment=True,
-        download_name=f"license_{license_id}.xlsx",  # Dynamically naming the file based on license_id
-        mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    return export_response(
+        EXPORTS["licenses"],
+        where=SoftwareLicense.license_id == license_id,
+        sheet_name="License",
+        download_name=f"license_{license_id}.xlsx",
     )
@@ -1,8 +1,11 @@
 from flask import Blueprint, request, jsonify
 from models import db, User
-from werkzeug.security import check_password_hash
-from flask_jwt_extended import create_access_token
+from flask_jwt_extended import jwt_required, get_jwt
 from flask_cors import CORS
+from requirements.identity import remember_identity, load_identity
+from requirements.tokens import issue_tokens, revoke_token, TokenAlreadyRevoked
+from requirements.hashing import hashing, HashingBusy
+from requirements.ratelimit import login_limiter
 
 # Create Blueprint for login functionality
 login_bp = Blueprint("login_bp", __name__)
@@ -11,7 +14,7 @@ login_bp = Blueprint("login_bp", __name__)
 CORS(
     login_bp,
     resources={
-        r"/login": {
+        r"/(login|refresh|logout)": {
             "origins": [
                 "http://localhost:3000",
                 "http://localhost:8080",
@@ -21,7 +24,7 @@ CORS(
                 "https://www.v97-cems.com"
             ],
             "methods": ["POST", "OPTIONS"],
-            "allow_headers": ["Content-Type"],
+            "allow_headers": ["Content-Type", "Authorization"],
             "supports_credentials": True,
         }
     },
@@ -36,25 +39,46 @@ def login():
 
     data = request.get_json()
 
-    if not data or not data.get("email") or not data.get("password"):
+    if not isinstance(data, dict) or not data.get("email") or not data.get("password"):
         return jsonify({"message": "Missing email or password"}), 400
+    if not isinstance(data["email"], str) or not isinstance(data["password"], str):
+        return jsonify({"message": "Email and password must be strings"}), 400
+
+    # Throttle by client IP and email before any DB or hashing work
+    retry_after = login_limiter.check(request.remote_addr, data["email"])
+    if retry_after:
+        return (
+            jsonify({"message": "Too many login attempts, please retry later"}),
+            429,
+            {"Retry-After": str(retry_after)},
+        )
 
     user = User.query.filter_by(email=data["email"]).first()
     if not user:
         return jsonify({"message": "Invalid credentials"}), 401
 
-    if user and check_password_hash(user.password, data["password"]):
+    # Verify the password on the hashing pool; shed load quickly when it is saturated
+    try:
+        password_ok = hashing.check_password(user.password, data["password"])
+    except HashingBusy as e:
+        return (
+            jsonify({"message": "Server busy, please retry"}),
+            503,
+            {"Retry-After": str(e.retry_after)},
+        )
+
+    if password_ok:
         role_name = user.role.role_name if user.role else "User"
+        remember_identity(user)
 
-        access_token = create_access_token(
-            identity=str(user.id), additional_claims={"role": role_name}
-        )
+        tokens = issue_tokens(user.id, role_name, user.role_version)
 
         return (
             jsonify(
                 {
                     "message": "Login successful",
-                    "access_token": access_token,
+                    "access_token": tokens["access_token"],
+                    "refresh_token": tokens["refresh_token"],
                     "user": {"id": user.id, "email": user.email, "role": role_name},
                 }
             ),
@@ -62,3 +86,47 @@ def login():
         )
 
     return jsonify({"message": "Invalid credentials"}), 401
+
+
+# Exchange a refresh token for a new access/refresh pair (no password hashing involved)
+@login_bp.route("/refresh", methods=["POST"])
+@jwt_required(refresh=True)
+def refresh():
+    claims = get_jwt()
+
+    # Read from the database: the new token's role claim must not come from a cache
+    identity = load_identity(claims["sub"], fresh=True)
+    if not identity:
+        return jsonify({"message": "User not found"}), 401
+
+    # Rotate: the presented refresh token can only be used once
+    try:
+        revoke_token(claims)
+    except TokenAlreadyRevoked:
+        return jsonify({"message": "Token has been revoked"}), 401
+
+    role_name = identity.role_name or "User"
+    tokens = issue_tokens(identity.id, role_name, identity.role_version)
+
+    return (
+        jsonify(
+            {
+                "message": "Token refreshed",
+                "access_token": tokens["access_token"],
+                "refresh_token": tokens["refresh_token"],
+            }
+        ),
+        200,
+    )
+
+
+# Revoke the presented token (send the refresh token to end the session). Revoking
+# an access token also revokes the user's access tokens issued before it.
+@login_bp.route("/logout", methods=["POST"])
+@jwt_required(verify_type=False)
+def logout():
+    try:
+        revoke_token(get_jwt())
+    except TokenAlreadyRevoked:
+        pass
+    return jsonify({"message": "Logged out"}), 200
@@ -1,16 +1,35 @@
-import pandas as pd
-from io import BytesIO
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify
 from models import Requirement, User, RequirementApproval, Role
 from requirements.__init__ import db
 from requirements.auth import role_required
-from flask_jwt_extended import jwt_required  # Import this to require JWT validation
+from flask_jwt_extended import jwt_required, current_user  # Import this to require JWT validation
 from flask_cors import CORS
-from .email_utils import send_email
+from requirements.cache import response_cache
+from requirements.conditional import conditional_list, conditional_detail
+from requirements.listing import paginate, apply_filters, parse_fields, project, list_endpoint
+from requirements.exports import EXPORTS, export_response
+from requirements.outbox import enqueue_email
+from requirements.notifications import notifications, requirement_context
 
 
 requirements_bp = Blueprint("requirements_bp", __name__)
 
+# Columns the requirements listing can be filtered and sorted on
+REQUIREMENT_FILTERS = {
+    name: getattr(Requirement, name)
+    for name in (
+        "requirement_id",
+        "business_unit",
+        "resource_requirement",
+        "resource_type",
+        "business_title",
+        "vector_title",
+        "department",
+        "created_date",
+        "last_modified_date",
+    )
+}
+
 CORS(
     requirements_bp,
     origins=[
@@ -39,28 +58,19 @@ def create_requirement():
         department=data["department"],
     )
     db.session.add(new_requirement)
-    db.session.commit()
+    db.session.flush()  # Fills in the dates used in the email
 
     # Hardcoded email for testing
     super_admin_email = "cems1812@gmail.com"
     subject = "New Requirement Created"
-    body = (
-    f"New Requirement Created\n\n"
-    f"Requirement Details:\n"
-    f"-------------------\n"
-    f"Business Unit: {new_requirement.business_unit}\n"
-    f"Resource Requirement: {new_requirement.resource_requirement}\n"
-    f"Job Description: {new_requirement.job_description}\n"
-    f"Resource Type: {new_requirement.resource_type}\n"
-    f"Business Title: {new_requirement.business_title}\n"
-    f"Vector Title: {new_requirement.vector_title}\n"
-    f"Comments: {new_requirement.comments}\n"
-    f"Department: {new_requirement.department}\n"
-    f"Created Date: {new_requirement.created_date}\n"
-    f"Last Modified Date: {new_requirement.last_modified_date}\n\n"
-    f"Please review the requirement at your earliest convenience."
-)
-    send_email(super_admin_email, subject, body)
+    body, html_body = notifications.render(
+        "email_template",
+        created_by=current_user.email,
+        **requirement_context(new_requirement),
+    )
+    # Queued in the same transaction; the outbox dispatcher sends it after the commit
+    enqueue_email(super_admin_email, subject, body, html_body)
+    db.session.commit()
 
     return jsonify({"message": "Requirement created successfully"}), 201
 
@@ -120,21 +130,29 @@ def create_requirement():
 @requirements_bp.route("/requirements", methods=["GET"])
 @jwt_required()  # Ensure the request has a valid JWT token
 @role_required(roles=["Admin", "Super-Admin"])
+@conditional_list(Requirement)
+@response_cache.cached(Requirement)
+@list_endpoint(REQUIREMENT_FILTERS)
 def get_requirements():
-    requirements = Requirement.query.all()
-    result = [req.to_dict() for req in requirements]
-    return jsonify({"count": len(requirements), "requirements": result})
+    fields = parse_fields(Requirement)
+    query = apply_filters(Requirement.query, REQUIREMENT_FILTERS)
+    page = paginate(query, Requirement.requirement_id, sortable=REQUIREMENT_FILTERS, fields=fields)
+    result = [req.to_dict(fields) for req in page.items]
+    return jsonify({"count": len(result), "requirements": result, "next_cursor": page.next_cursor})
 
 
 # Get a specific requirement (Accessible to Admin only)
 @requirements_bp.route("/requirements/<int:id>", methods=["GET"])
 @jwt_required()  # Ensure the request has a valid JWT token
 @role_required(roles=["Admin", "Super-Admin"])
+@conditional_detail(Requirement)
+@response_cache.cached(Requirement)
 def get_requirement(id):
-    requirement = Requirement.query.get(id)
+    fields = parse_fields(Requirement)
+    requirement = project(Requirement.query, Requirement, fields).get(id)
     if not requirement:
         return jsonify({"message": "Requirement not found"}), 404
-    return jsonify(requirement.to_dict())  # Using to_dict() for serialization
+    return jsonify(requirement.to_dict(fields))  # Using to_dict() for serialization
 
 
 # Update a requirement (Accessible to Admin only)
@@ -179,32 +197,8 @@ def delete_requirement(id):
 @jwt_required()  # Ensure the request has a valid JWT token
 @role_required(roles=["Admin", "Super-Admin"])  # Make sure only authorized users can access this
 def export_requirements_to_excel():
-    # Query all requirements from the database
-    requirements = Requirement.query.all()
-
-    # Convert the requirements to a list of dictionaries
-    data = [req.to_dict() for req in requirements]
-
-    # Convert the data into a pandas DataFrame
-    df = pd.DataFrame(data)
-
-    # Create a BytesIO object to store the Excel file in memory
-    excel_file = BytesIO()
-
-    # Write the DataFrame to the Excel file using openpyxl engine
-    with pd.ExcelWriter(excel_file, engine="openpyxl") as writer:
-        df.to_excel(writer, index=False, sheet_name="Requirements")
-
-    # Seek to the beginning of the file so it can be read
-    excel_file.seek(0)
-
-    # Send the file as a response with an appropriate content type and filename
-    return send_file(
-        excel_file,
-        as_attachment=True,  # This will prompt automatic download
-        download_name="requirements.xlsx",  # You can modify the filename as needed
-        mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
+    # Rows are streamed from the database as xlsx, csv or ndjson (?format=)
+    return export_response(EXPORTS["requirements"], filterable=REQUIREMENT_FILTERS)
 
 
 # Export a single requirement by ID to Excel (Download Single Requirement)
@@ -212,32 +206,10 @@ def export_requirements_to_excel():
 @jwt_required()  # Ensure the request has a valid JWT token
 @role_required(roles=["Admin", "Super-Admin"])  # Make sure only authorized users can access this
 def export_single_requirement_to_excel(id):
-    # Query the requirement by ID from the database
-    requirement = Requirement.query.get(id)
-
-    if not requirement:
-        return jsonify({"message": "Requirement not found"}), 404
-
-    # Convert the requirement to a dictionary
-    data = [requirement.to_dict()]
-
-    # Convert the data into a pandas DataFrame
-    df = pd.DataFrame(data)
-
-    # Create a BytesIO object to store the Excel file in memory
-    excel_file = BytesIO()
-
-    # Write the DataFrame to the Excel file using openpyxl engine
-    with pd.ExcelWriter(excel_file, engine="openpyxl") as writer:
-        df.to_excel(writer, index=False, sheet_name="Requirement")
-
-    # Seek to the beginning of the file so it can be read
-    excel_file.seek(0)
-
-    # Send the file as a response with an appropriate content type and filename
-    return send_file(
-        excel_file,
-        as_attachment=True,  # This will prompt automatic download
-        download_name=f"requirement_{id}.xlsx",  # Custom filename for single requirement
-        mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    return export_response(
+        EXPORTS["requirements"],
+        where=Requirement.requirement_id == id,
+        sheet_name="Requirement",
+        download_name=f"requirement_{id}.xlsx",
+        not_found="Requirement not found",
     )
@@ -1,7 +1,9 @@
-from flask import Blueprint, request, jsonify
-from werkzeug.security import generate_password_hash
+from flask import Blueprint, request, jsonify, current_app
+from sqlalchemy import insert
 from models import db, User, Role
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, current_user
+from requirements.auth import change_role, role_required
+from requirements.hashing import hashing, HashingBusy
 
 user_bp = Blueprint('users', __name__)
 
@@ -15,8 +17,11 @@ def create_user():
     if existing_user:
         return jsonify({"message": "User already exists"}), 400
 
-    # Hash the password
-    hashed_password = generate_password_hash(data['password'])
+    # Hash the password on the hashing pool
+    try:
+        hashed_password = hashing.hash_password(data['password'])
+    except HashingBusy as e:
+        return jsonify({"message": "Server busy, please retry"}), 503, {"Retry-After": str(e.retry_after)}
 
     # Create new user and assign the Admin role (role_id = 1 for Admin)
     new_user = User(
@@ -38,14 +43,8 @@ def create_user():
 def assign_role(user_id):
     data = request.get_json()
 
-    # Get the current user's ID from the JWT token
-    current_user_id = get_jwt_identity()
-
-    # Fetch the current user from the database using current_user_id
-    current_user = User.query.get(current_user_id)
-
-    # Ensure the current user is an Admin (by checking the role of the current user)
-    if current_user is None or current_user.role is None or current_user.role.role_name != 'Admin':
+    # Ensure the current user is an Admin (current_user is resolved through the identity cache)
+    if current_user is None or current_user.role_name != 'Admin':
         return jsonify({"message": "Access denied. Admins only."}), 403
 
     # Fetch the requested role from the database
@@ -59,7 +58,90 @@ def assign_role(user_id):
         return jsonify({"message": "User not found"}), 404
 
     # Assign the new role to the user
-    user.role_id = role.role_id
+    change_role(user, role)
     db.session.commit()
 
-    return jsonify({"message": f"Role {role.role_name} assigned to user {user.email}"}), 200
\ No newline at end of file
+    return jsonify({"message": f"Role {role.role_name} assigned to user {user.email}"}), 200
+
+# Bulk-create users: one existence query, parallel hashing and a single insert transaction
+@user_bp.route('/bulk', methods=['POST'])
+@jwt_required()
+@role_required(roles=['Admin', 'Super-Admin'])
+def create_users_bulk():
+    data = request.get_json() or {}
+    rows = data.get('users')
+    if not isinstance(rows, list) or not rows:
+        return jsonify({"message": "users must be a non-empty list"}), 400
+
+    max_rows = current_app.config.get('USERS_BULK_MAX', 50)
+    if len(rows) > max_rows:
+        return jsonify({"message": f"At most {max_rows} users can be created per request"}), 413
+
+    results = [None] * len(rows)
+    pending = {}  # email -> index of the row that will create it
+
+    # Validate rows and reject duplicates within the payload
+    for index, row in enumerate(rows):
+        row = row if isinstance(row, dict) else {}
+        email, password, role_name = row.get('email'), row.get('password'), row.get('role_name')
+        if not email or not password:
+            results[index] = {"index": index, "email": email, "status": "error", "message": "Missing email or password"}
+        elif not isinstance(email, str) or not isinstance(password, str):
+            results[index] = {"index": index, "email": None, "status": "error", "message": "email and password must be strings"}
+        elif not role_name:
+            # No default: bulk rows must name their role explicitly
+            results[index] = {"index": index, "email": email, "status": "error", "message": "Missing role_name"}
+        elif not isinstance(role_name, str):
+            results[index] = {"index": index, "email": email, "status": "error", "message": "role_name must be a string"}
+        elif email in pending:
+            results[index] = {"index": index, "email": email, "status": "error", "message": "Duplicate email in request"}
+        else:
+            pending[email] = index
+
+    # Resolve requested roles with a single query
+    role_names = {rows[i]['role_name'] for i in pending.values()}
+    role_ids = dict(
+        db.session.query(Role.role_name, Role.role_id).filter(Role.role_name.in_(role_names)).all()
+    ) if role_names else {}
+
+    # Check which emails are already registered with a single IN query
+    existing = {
+        email for (email,) in db.session.query(User.email).filter(User.email.in_(list(pending))).all()
+    } if pending else set()
+
+    to_create = []
+    for email, index in pending.items():
+        role_name = rows[index]['role_name']
+        if email in existing:
+            results[index] = {"index": index, "email": email, "status": "error", "message": "User already exists"}
+        elif role_name not in role_ids:
+            results[index] = {"index": index, "email": email, "status": "error", "message": "Role not found"}
+        else:
+            to_create.append((index, email, role_ids[role_name]))
+
+    if to_create:
+        # Hash the passwords in parallel on the hashing pool, sharing it with logins
+        try:
+            hashed = hashing.hash_passwords(rows[index]['password'] for index, _, _ in to_create)
+        except HashingBusy as e:
+            return jsonify({"message": "Server busy, please retry"}), 503, {"Retry-After": str(e.retry_after)}
+
+        # One executemany-style INSERT inside one transaction
+        db.session.execute(
+            insert(User),
+            [
+                {"email": email, "password": password, "role_id": role_id}
+                for (_, email, role_id), password in zip(to_create, hashed)
+            ],
+        )
+        db.session.commit()
+
+        for index, email, _ in to_create:
+            results[index] = {"index": index, "email": email, "status": "created"}
+
+    return jsonify({
+        "message": "Bulk user creation processed",
+        "created": len(to_create),
+        "failed": len(rows) - len(to_create),
+        "results": results,
+    }), 200
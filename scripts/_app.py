@@ -0,0 +1,45 @@
+"""
+Shared setup for the benchmark scripts: an app on a throwaway SQLite
+database (and shared-state directory) with the roles seeded.
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def bench_app(folder=None, **config):
+    """
+    Creates the app, with its database in folder (a new temporary directory
+    by default) and config overriding Config. Returns (app, db).
+    """
+    folder = folder or tempfile.mkdtemp(prefix="bench-")
+    os.environ.setdefault("your_jwt_secret_key", "bench-" * 8)
+    os.environ["SHARED_STATE_DIR"] = folder
+
+    from config import Config
+
+    Config.SQLALCHEMY_DATABASE_URI = f"sqlite:///{folder}/bench.db"
+    for key, value in config.items():
+        setattr(Config, key, value)
+
+    from requirements.__init__ import create_app, db
+    from models import Role
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        if not Role.query.first():  # Another process may have set the folder up
+            for role_id, role_name in enumerate(
+                ["Admin", "Super-Admin", "HR", "TA-Admin", "IT-Admin"], 1
+            ):
+                db.session.add(Role(role_id=role_id, role_name=role_name))
+            db.session.commit()
+    return app, db
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
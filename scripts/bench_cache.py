@@ -0,0 +1,79 @@
+"""
+Response cache hit latency per backend: the backend lookup a hit costs (the
+table generations plus the entry) and a whole cached GET /requirements
+through the test client. NullCache is the uncached baseline.
+
+    python scripts/bench_cache.py --size 20000 --requests 2000
+"""
+import argparse
+import time
+from _app import bench_app, percentile
+
+
+def timings(fn, count):
+    latencies = []
+    for _ in range(count):
+        t = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - t)
+    return percentile(latencies, 0.5) * 1e6, percentile(latencies, 0.99) * 1e6
+
+
+def run(cache_type, args):
+    app, db = bench_app(CACHE_TYPE=cache_type, LOGIN_RATE_LIMIT_ENABLED=False, HASH_POOL_WORKERS=0)
+    from werkzeug.security import generate_password_hash
+    from models import Requirement, User
+    from requirements.cache import response_cache
+
+    with app.app_context():
+        db.session.add(
+            User(email="bench@bench.test", password=generate_password_hash("bench"), role_id=2)
+        )
+        db.session.add_all(
+            Requirement(
+                business_unit="IT", resource_requirement="r", job_description="jd",
+                resource_type="FT", business_title=f"T{n}", vector_title="v",
+                comments="c", department="D",
+            )
+            for n in range(args.rows)
+        )
+        db.session.commit()
+
+    backend = response_cache.backend
+    tables = ["requirements"]
+    backend.set("bench", (b"x" * args.size, 200, "application/json"), 300)
+
+    def lookup():
+        backend.generations(tables)
+        backend.get("bench")
+
+    lookup_p50, lookup_p99 = timings(lookup, args.requests)
+
+    client = app.test_client()
+    token = client.post(
+        "/login", json={"email": "bench@bench.test", "password": "bench"}
+    ).json["access_token"]
+    headers = {"Authorization": "Bearer " + token}
+    url = f"/requirements?limit={args.rows}"
+    client.get(url, headers=headers)  # Fill the cache
+    get_p50, get_p99 = timings(lambda: client.get(url, headers=headers), args.requests)
+    size = len(client.get(url, headers=headers).data)
+
+    print(
+        f"{cache_type:>11}: lookup p50 {lookup_p50:7.1f} us  p99 {lookup_p99:7.1f} us"
+        f" | GET ({size // 1024} KiB) p50 {get_p50:7.0f} us  p99 {get_p99:7.0f} us"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", type=int, default=20000, help="Bytes per cached entry.")
+    parser.add_argument("--rows", type=int, default=50, help="Requirements listed per GET.")
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    for cache_type in ("NullCache", "SimpleCache", "SQLiteCache"):
+        run(cache_type, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Peak memory of exporting a large requirements table (100k rows by default)
+in each format. Every export runs in a fresh process, which reports the peak
+of Python allocations (tracemalloc), how far its peak RSS grew during the
+export, the time taken and the file size. --legacy also measures the
+original xlsx export (every row loaded as an ORM object into a pandas
+DataFrame, written to an in-memory BytesIO) for comparison.
+
+    python scripts/bench_export_memory.py --rows 100000 --legacy
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+import tracemalloc
+from _app import bench_app
+
+LEGACY = "legacy xlsx"
+
+
+def seed(folder, rows):
+    app, db = bench_app(folder)
+    from sqlalchemy import insert
+    from models import Requirement, get_current_utc_time
+
+    now = get_current_utc_time()
+    with app.app_context():
+        for start in range(0, rows, 10000):
+            db.session.execute(
+                insert(Requirement),
+                [
+                    {
+                        "business_unit": "IT", "resource_requirement": "r",
+                        "job_description": "jd" * 50, "resource_type": "FT",
+                        "business_title": f"T{n}", "vector_title": "v", "comments": "c",
+                        "department": "D", "created_date": now, "last_modified_date": now,
+                    }
+                    for n in range(start, min(start + 10000, rows))
+                ],
+            )
+        db.session.commit()
+
+
+def legacy_export(fileobj):
+    # The export as it was before streaming: the whole table as ORM objects,
+    # then as dicts, then as a DataFrame, then as a workbook in memory
+    from io import BytesIO
+    import pandas as pd
+    from models import Requirement
+
+    data = [req.to_dict() for req in Requirement.query.all()]
+    df = pd.DataFrame(data)
+    excel_file = BytesIO()
+    with pd.ExcelWriter(excel_file, engine="openpyxl") as writer:
+        df.to_excel(writer, index=False, sheet_name="Requirements")
+    fileobj.write(excel_file.getvalue())
+
+
+def measure(folder, export_format, results):
+    app, db = bench_app(folder)
+    from requirements.exports import EXPORTS, iter_frames, write_export
+
+    spec = EXPORTS["requirements"]
+    legacy = export_format == LEGACY
+    path = os.path.join(folder, "export.legacy.xlsx" if legacy else f"export.{export_format}")
+    with app.app_context():
+        db.session.execute(spec.statement().limit(1)).all()  # Connect and compile outside the peak
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        tracemalloc.start()
+        t = time.perf_counter()
+        with open(path, "wb") as fileobj:
+            if legacy:
+                legacy_export(fileobj)
+            else:
+                write_export(
+                    export_format, spec.headers, iter_frames(spec, spec.statement()), fileobj,
+                    sheet_name=spec.sheet_name,
+                )
+        elapsed = time.perf_counter() - t
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        rss_growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+    results.put((elapsed, peak, rss_growth * 1024, os.path.getsize(path)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--formats", default="xlsx,csv,ndjson")
+    parser.add_argument(
+        "--legacy", action="store_true", help="Also measure the original pandas/BytesIO xlsx export."
+    )
+    args = parser.parse_args()
+    formats = args.formats.split(",") + ([LEGACY] if args.legacy else [])
+
+    folder = tempfile.mkdtemp(prefix="bench-")
+    seed(folder, args.rows)
+    context = multiprocessing.get_context("spawn")
+    mib = 1024 * 1024
+    for export_format in formats:
+        results = context.Queue()
+        process = context.Process(target=measure, args=(folder, export_format, results))
+        process.start()
+        elapsed, peak, rss_growth, size = results.get()
+        process.join()
+        print(
+            f"{export_format:>13}: {args.rows} rows in {elapsed:5.1f} s  file {size / mib:6.1f} MiB"
+            f"  peak Python allocations {peak / mib:5.1f} MiB  RSS growth {rss_growth / mib:5.1f} MiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
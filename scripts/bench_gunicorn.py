@@ -0,0 +1,145 @@
+"""
+Memory and throughput of the gunicorn profile (gunicorn.conf.py: preload,
+warmup, gc.freeze) against bare gunicorn with the same number of sync
+workers. Prints req/s on cached list and detail GETs and each worker's
+average RSS, PSS and private memory. Linux only (reads /proc/<pid>/smaps_rollup).
+
+    python scripts/bench_gunicorn.py --workers 3 --clients 8 --seconds 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from _app import ROOT, bench_app
+
+
+def request(url, data=None, headers=None):
+    body = json.dumps(data).encode() if data is not None else None
+    req = urllib.request.Request(
+        url, data=body, headers={"Content-Type": "application/json", **(headers or {})}
+    )
+    with urllib.request.urlopen(req) as response:
+        return response.read()
+
+
+def seed(folder, requirements):
+    app, db = bench_app(folder)
+    from werkzeug.security import generate_password_hash
+    from models import Requirement, User
+
+    with app.app_context():
+        db.session.add(
+            User(email="bench@bench.test", password=generate_password_hash("bench"), role_id=2)
+        )
+        db.session.add_all(
+            Requirement(
+                business_unit="IT", resource_requirement="r", job_description="jd",
+                resource_type="FT", business_title=f"T{n}", vector_title="v",
+                comments="c", department="D",
+            )
+            for n in range(requirements)
+        )
+        db.session.commit()
+
+
+def worker_memory(master_pid):
+    """
+    Average smaps_rollup figures (MiB) over the master's worker processes.
+    """
+    pids = subprocess.check_output(["pgrep", "-P", str(master_pid)]).split()
+    totals = {"rss": 0, "pss": 0, "private": 0}
+    for pid in pids:
+        fields = {}
+        with open(f"/proc/{int(pid)}/smaps_rollup") as smaps:
+            for line in smaps:
+                name, *values = line.split()
+                if values and values[0].isdigit():
+                    fields[name.rstrip(":")] = int(values[0])
+        totals["rss"] += fields["Rss"]
+        totals["pss"] += fields["Pss"]
+        totals["private"] += fields["Private_Clean"] + fields["Private_Dirty"]
+    return {name: total / len(pids) / 1024 for name, total in totals.items()}
+
+
+def load(base, clients, seconds):
+    token = json.loads(
+        request(base + "/login", {"email": "bench@bench.test", "password": "bench"})
+    )["access_token"]
+    headers = {"Authorization": "Bearer " + token}
+    urls = [base + "/requirements?limit=50", base + "/requirements/3"]
+    counts = [0] * clients
+    stop = time.monotonic() + seconds
+
+    def client(n):
+        while time.monotonic() < stop:
+            request(urls[counts[n] % 2], headers=headers)
+            counts[n] += 1
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / seconds
+
+
+def run(label, command, env, args):
+    process = subprocess.Popen(
+        command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base = f"http://127.0.0.1:{args.port}"
+    try:
+        for _ in range(100):
+            try:
+                request(base + "/login", {})
+            except urllib.error.HTTPError:
+                break  # Up: the empty login is rejected
+            except OSError:
+                time.sleep(0.2)
+        rate = load(base, args.clients, args.seconds)
+        memory = worker_memory(process.pid)
+    finally:
+        process.terminate()
+        process.wait()
+    print(
+        f"{label:>14}: {rate:6.0f} req/s  RSS {memory['rss']:5.1f} MiB"
+        f"  PSS {memory['pss']:5.1f} MiB  private {memory['private']:5.1f} MiB per worker"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8123)
+    args = parser.parse_args()
+
+    folder = tempfile.mkdtemp(prefix="bench-")
+    seed(folder, requirements=200)
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{folder}/bench.db",
+        SHARED_STATE_DIR=folder,
+        PORT=str(args.port),
+        WEB_CONCURRENCY=str(args.workers),
+        CACHE_TYPE="SQLiteCache",
+        HASH_POOL_WORKERS="0",
+    )
+    bind = f"127.0.0.1:{args.port}"
+    run(
+        "bare gunicorn",
+        ["gunicorn", "-c", "/dev/null", "-w", str(args.workers), "-b", bind, "app:app"],
+        env,
+        args,
+    )
+    run("gunicorn.conf", ["gunicorn", "-c", "gunicorn.conf.py", "-b", bind, "app:app"], env, args)
+
+
+if __name__ == "__main__":
+    main()
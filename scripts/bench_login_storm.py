@@ -0,0 +1,115 @@
+"""
+Login storm: many clients logging in at once against one web worker, with
+passwords checked inline and on the hashing pool, while other clients keep
+reading an authenticated endpoint. Prints login throughput, p50/p99 latency
+and the number of 503s, plus the p50/p99 latency of the reads, for each.
+
+    python scripts/bench_login_storm.py --clients 32 --logins 20 --readers 4
+"""
+import argparse
+import os
+import threading
+import time
+from _app import bench_app, percentile
+
+
+def storm(app, clients, logins, readers, token):
+    latencies = []
+    statuses = []
+    read_latencies = []
+    lock = threading.Lock()
+    start = threading.Barrier(clients + readers + 1)
+    done = threading.Event()
+
+    def client(n):
+        test_client = app.test_client()
+        start.wait()
+        for _ in range(logins):
+            t = time.perf_counter()
+            response = test_client.post(
+                "/login", json={"email": f"user{n}@bench.test", "password": "bench-password"}
+            )
+            with lock:
+                latencies.append(time.perf_counter() - t)
+                statuses.append(response.status_code)
+
+    def reader():
+        test_client = app.test_client()
+        headers = {"Authorization": f"Bearer {token}"}
+        start.wait()
+        while not done.is_set():
+            t = time.perf_counter()
+            response = test_client.get("/joining", headers=headers)
+            assert response.status_code == 200, response.status_code
+            with lock:
+                read_latencies.append(time.perf_counter() - t)
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    reading = [threading.Thread(target=reader) for _ in range(readers)]
+    for thread in threads + reading:
+        thread.start()
+    start.wait()
+    t = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - t
+    done.set()
+    for thread in reading:
+        thread.join()
+    return elapsed, latencies, statuses, read_latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--logins", type=int, default=20, help="Logins per client.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Pool processes.")
+    parser.add_argument(
+        "--readers", type=int, default=4, help="Clients reading /joining during the storm."
+    )
+    args = parser.parse_args()
+
+    app, db = bench_app(LOGIN_RATE_LIMIT_ENABLED=False)
+    from werkzeug.security import generate_password_hash
+    from models import Joining, User
+    from requirements.hashing import hashing
+
+    password = generate_password_hash("bench-password")
+    with app.app_context():
+        db.session.add_all(
+            User(email=f"user{n}@bench.test", password=password, role_id=3)
+            for n in range(args.clients)
+        )
+        db.session.add_all(Joining(first_name=f"Bench {n}") for n in range(50))
+        db.session.commit()
+
+    app.config["HASH_POOL_WORKERS"] = 0
+    hashing.configure(app)
+    token = app.test_client().post(
+        "/login", json={"email": "user0@bench.test", "password": "bench-password"}
+    ).json["access_token"]
+
+    for label, workers in (("inline", 0), (f"pool x{args.workers}", args.workers)):
+        app.config["HASH_POOL_WORKERS"] = workers
+        hashing.configure(app)
+        if workers:
+            hashing.check_password(password, "warm up")  # Start the pool processes
+        elapsed, latencies, statuses, read_latencies = storm(
+            app, args.clients, args.logins, args.readers, token
+        )
+        print(
+            f"{label:>12}: {len(latencies) / elapsed:7.1f} logins/s"
+            f"  p50 {percentile(latencies, 0.5) * 1000:6.0f} ms"
+            f"  p99 {percentile(latencies, 0.99) * 1000:6.0f} ms"
+            f"  503s {statuses.count(503)}"
+        )
+        if read_latencies:
+            print(
+                f"{'':>12}  {len(read_latencies):7d} reads   "
+                f"  p50 {percentile(read_latencies, 0.5) * 1000:6.0f} ms"
+                f"  p99 {percentile(read_latencies, 0.99) * 1000:6.0f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
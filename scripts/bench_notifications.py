@@ -0,0 +1,101 @@
+"""
+Rendering time of the notification emails (email_template for one
+requirement, email_digest for --requirements of them), with and without the
+on-disk bytecode cache. Every case runs in a fresh process, like a newly
+started worker: the cold time is its first render of both notifications
+(loading and compiling the templates included), the warm times are the
+median of the --renders renders that follow.
+
+    python scripts/bench_notifications.py --requirements 200 --renders 200
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import tempfile
+import time
+from _app import bench_app
+
+CASES = (
+    ("no bytecode cache", None),
+    ("empty bytecode cache", "template_cache"),
+    ("primed bytecode cache", "template_cache"),  # Written by the case before
+)
+
+
+def notification_contexts(count):
+    from requirements.notifications import requirement_context
+    from models import Requirement, get_current_utc_time
+
+    now = get_current_utc_time()
+    requirements = [
+        Requirement(
+            requirement_id=n, business_unit="IT", resource_requirement="r",
+            job_description="jd " * 50, resource_type="FT", business_title=f"T{n}",
+            vector_title="v", comments="<c>", department="D",
+            created_date=now, last_modified_date=now,
+        )
+        for n in range(1, count + 1)
+    ]
+    return {
+        "email_template": requirement_context(requirements[0]),
+        "email_digest": {
+            "since": now.strftime("%Y-%m-%d %H:%M UTC"),
+            "requirements": [requirement_context(requirement) for requirement in requirements],
+        },
+    }
+
+
+def measure(folder, cache_folder, count, renders, results):
+    app, db = bench_app(folder)
+    from requirements.notifications import NotificationRenderer
+
+    renderer = NotificationRenderer()
+    renderer.configure(app)
+    renderer.cache_folder = cache_folder and os.path.join(folder, cache_folder)
+    contexts = notification_contexts(count)
+
+    t = time.perf_counter()
+    for name, context in contexts.items():
+        renderer.render(name, **context)
+    cold = time.perf_counter() - t
+
+    warm = {}
+    for name, context in contexts.items():
+        times = []
+        for _ in range(renders):
+            t = time.perf_counter()
+            renderer.render(name, **context)
+            times.append(time.perf_counter() - t)
+        warm[name] = statistics.median(times)
+    results.put((cold, warm))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--requirements", type=int, default=200, help="Requirements listed in the digest."
+    )
+    parser.add_argument("--renders", type=int, default=200, help="Warm renders per notification.")
+    args = parser.parse_args()
+
+    folder = tempfile.mkdtemp(prefix="bench-")
+    bench_app(folder)  # Create the database before the processes share it
+    context = multiprocessing.get_context("spawn")
+    for label, cache_folder in CASES:
+        results = context.Queue()
+        process = context.Process(
+            target=measure, args=(folder, cache_folder, args.requirements, args.renders, results)
+        )
+        process.start()
+        cold, warm = results.get()
+        process.join()
+        print(
+            f"{label:>21}: cold {cold * 1000:6.1f} ms"
+            f"  warm email_template {warm['email_template'] * 1000:6.2f} ms"
+            f"  email_digest {warm['email_digest'] * 1000:6.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
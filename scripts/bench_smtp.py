@@ -0,0 +1,144 @@
+"""
+Checks MailTransport against a local aiosmtpd server, then measures msgs/sec
+with a connection (and login) per message, as before the pool, and with
+pooled sessions. Needs aiosmtpd (pip install aiosmtpd).
+
+Checked: every message is delivered, a multi-recipient message goes out in
+one transaction, a refused recipient fails only its own message without
+dropping the session, and a pooled session whose server went away is
+replaced on the next send.
+
+    python scripts/bench_smtp.py --messages 1000
+"""
+import argparse
+import smtplib
+import time
+from email.message import EmailMessage
+import _app  # noqa: F401  puts the project root on sys.path
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import AuthResult
+from requirements.mail import MailTransport
+
+HOST = "127.0.0.1"
+
+
+class Recorder:
+    """
+    aiosmtpd handler that keeps what it receives and refuses the addresses in refuse.
+    """
+
+    def __init__(self):
+        self.messages = []
+        self.connections = 0
+        self.refuse = set()
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address in self.refuse:
+            return "550 No such user"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append((envelope.mail_from, list(envelope.rcpt_tos)))
+        return "250 OK"
+
+
+class CountingController(Controller):
+    def factory(self):
+        self.handler.connections += 1
+        return super().factory()
+
+
+def start_server(port):
+    recorder = Recorder()
+    controller = CountingController(
+        recorder,
+        hostname=HOST,
+        port=port,
+        auth_require_tls=False,
+        authenticator=lambda *args: AuthResult(success=True),
+    )
+    controller.start()
+    recorder.connections = 0  # start() opens one to check the server is up
+    return controller, recorder
+
+
+def transport_for(port):
+    transport = MailTransport()
+    transport.host, transport.port = HOST, port
+    transport.username, transport.password = "bench", "bench"
+    transport.sender = "bench@bench.test"
+    return transport
+
+
+def check(port):
+    controller, recorder = start_server(port)
+    transport = transport_for(port)
+    try:
+        messages = [transport.message(f"user{n}@bench.test", f"m{n}", "body") for n in range(20)]
+        messages.append(transport.message("a@bench.test, b@bench.test", "multi", "body"))
+        assert transport.send_many(messages) == [None] * len(messages)
+        assert len(recorder.messages) == len(messages)
+        assert recorder.messages[-1][1] == ["a@bench.test", "b@bench.test"]
+        assert recorder.connections == 1, recorder.connections
+
+        recorder.refuse = {"bad@bench.test"}
+        errors = transport.send_many(
+            [transport.message(to, "refused", "body") for to in ("bad@bench.test", "ok@bench.test")]
+        )
+        assert isinstance(errors[0], smtplib.SMTPRecipientsRefused) and errors[1] is None, errors
+        assert recorder.connections == 1, recorder.connections
+    finally:
+        controller.stop()
+
+    # The pooled session now points at a server that is gone
+    controller, recorder = start_server(port)
+    try:
+        transport.noop_after = 0
+        assert transport.send_many([transport.message("after@bench.test", "restart", "body")]) == [None]
+        assert len(recorder.messages) == 1
+    finally:
+        transport.close()
+        controller.stop()
+    print("checks passed")
+
+
+def bench(port, count, batch):
+    controller, recorder = start_server(port)
+    transport = transport_for(port)
+    messages = [transport.message(f"user{n}@bench.test", f"m{n}", "body " * 40) for n in range(count)]
+    try:
+        t = time.perf_counter()
+        for message in messages:
+            with smtplib.SMTP(HOST, port) as smtp:
+                smtp.login("bench", "bench")
+                smtp.send_message(message)
+        per_message = time.perf_counter() - t
+
+        connections = recorder.connections
+        t = time.perf_counter()
+        for start in range(0, count, batch):
+            assert not any(transport.send_many(messages[start:start + batch]))
+        pooled = time.perf_counter() - t
+    finally:
+        transport.close()
+        controller.stop()
+    print(f"connection per message: {count / per_message:7.0f} msgs/s ({count} connections)")
+    print(
+        f"pooled sessions:        {count / pooled:7.0f} msgs/s"
+        f" ({recorder.connections - connections} connections)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--batch", type=int, default=50, help="Messages per send_many (OUTBOX_BATCH_SIZE).")
+    parser.add_argument("--port", type=int, default=8025)
+    args = parser.parse_args()
+    check(args.port)
+    bench(args.port + 1, args.messages, args.batch)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Read throughput on SQLite while a writer commits continuously, with the
+configured SQLITE_PRAGMAS (WAL, synchronous=NORMAL, ...) and with SQLite's
+rollback journal defaults. Readers and the writer are separate processes,
+like gunicorn workers sharing the database file. Prints reads/s, read p99,
+writes/s and errors.
+
+    python scripts/bench_sqlite_wal.py --readers 4 --seconds 5
+"""
+import argparse
+import multiprocessing
+import tempfile
+import time
+from _app import bench_app, percentile
+
+
+def requirement(n):
+    from models import Requirement
+
+    return Requirement(
+        business_unit="IT", resource_requirement="r", job_description="jd" * 50,
+        resource_type="FT", business_title=f"T{n}", vector_title="v", comments="c",
+        department="D",
+    )
+
+
+def reader(folder, pragmas, start, seconds, results):
+    app, db = bench_app(folder, SQLITE_PRAGMAS=pragmas)
+    from models import Requirement
+
+    latencies, errors = [], 0
+    start.wait()
+    stop = time.monotonic() + seconds
+    with app.app_context():
+        while time.monotonic() < stop:
+            t = time.perf_counter()
+            try:
+                Requirement.query.order_by(Requirement.requirement_id.desc()).limit(50).all()
+            except Exception:
+                errors += 1
+            finally:
+                db.session.remove()
+            latencies.append(time.perf_counter() - t)
+    results.put(("read", latencies, errors))
+
+
+def writer(folder, pragmas, start, seconds, results):
+    app, db = bench_app(folder, SQLITE_PRAGMAS=pragmas)
+    writes, errors = 0, 0
+    start.wait()
+    stop = time.monotonic() + seconds
+    with app.app_context():
+        while time.monotonic() < stop:
+            try:
+                db.session.add(requirement(writes))
+                db.session.commit()
+                writes += 1
+            except Exception:
+                db.session.rollback()
+                errors += 1
+    results.put(("write", writes, errors))
+
+
+def run(label, pragmas, args):
+    folder = tempfile.mkdtemp(prefix="bench-")
+    app, db = bench_app(folder, SQLITE_PRAGMAS=pragmas)
+    with app.app_context():
+        db.session.add_all(requirement(n) for n in range(args.rows))
+        db.session.commit()
+        db.engine.dispose()
+
+    context = multiprocessing.get_context("spawn")
+    start = context.Barrier(args.readers + 1)
+    results = context.Queue()
+    processes = [
+        context.Process(target=reader, args=(folder, pragmas, start, args.seconds, results))
+        for _ in range(args.readers)
+    ]
+    processes.append(
+        context.Process(target=writer, args=(folder, pragmas, start, args.seconds, results))
+    )
+    for process in processes:
+        process.start()
+
+    reads, writes, errors = [], 0, 0
+    for _ in processes:
+        kind, value, failed = results.get()
+        if kind == "read":
+            reads.extend(value)
+        else:
+            writes = value
+        errors += failed
+    for process in processes:
+        process.join()
+
+    print(
+        f"{label:>9}: {len(reads) / args.seconds:7.0f} reads/s"
+        f"  p99 {percentile(reads, 0.99) * 1000:6.1f} ms"
+        f"  {writes / args.seconds:6.0f} writes/s  {errors} errors"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--seconds", type=int, default=5)
+    args = parser.parse_args()
+
+    from config import Config
+
+    pragmas = dict(Config.SQLITE_PRAGMAS)  # bench_app() overrides Config
+    run("journal", {"journal_mode": "DELETE", "busy_timeout": 5000}, args)
+    run("pragmas", pragmas, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -19,19 +19,19 @@ def save_pdf(file):
 # utils.py
 
 from flask_jwt_extended import get_jwt_identity
-from models import User
+from requirements.identity import load_identity
 
 def check_role(required_role):
     """
     Check if the currently authenticated user has the required role.
     Raises a Forbidden error if the user does not have the required role.
     """
-    current_user_email = get_jwt_identity()  # Get the email of the currently logged-in user
-    user = User.query.filter_by(email=current_user_email).first()  # Fetch user from the database by email
+    current_user_id = get_jwt_identity()  # The JWT identity is the user's ID
+    user = load_identity(current_user_id)  # Resolved through the identity cache
     
     if not user:
         raise Exception("User not found")
     
-    if user.role.role_name != required_role:  # Check if the user has the required role
+    if user.role_name != required_role:  # Check if the user has the required role
         raise PermissionError(f"User does not have the {required_role} role.")
 